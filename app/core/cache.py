@@ -0,0 +1,477 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Hashable
+from app.core.config import get_settings
+
+_MISSING = object()
+
+
+class _LeaderCancelled(Exception):
+    # quem carregava a chave foi cancelado (ex: cliente desconectou); os que
+    # esperavam não herdam o cancelamento: um deles assume o carregamento
+    pass
+
+
+class TTLCache:
+    """Cache LRU em memória (por worker) com tamanho máximo e TTL.
+
+    `get_or_load` faz coalescing (single-flight): chamadas concorrentes para
+    a mesma chave esperam o mesmo carregamento em vez de repeti-lo.
+    get/set/delete são thread-safe (rotas sync rodam no threadpool).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + min(ttl or self.ttl, self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        # retorna (valor, carregado_por_esta_chamada)
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                return value, False
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending), False
+            except _LeaderCancelled:
+                continue
+
+        self.misses += 1
+        fut = asyncio.get_running_loop().create_future()
+        # evita "Future exception was never retrieved" quando ninguém mais espera
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = fut
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            fut.set_exception(_LeaderCancelled())
+            raise
+        except Exception as exc:
+            fut.set_exception(exc)
+            raise
+        else:
+            self.set(key, value)
+            fut.set_result(value)
+        finally:
+            self._inflight.pop(key, None)
+        return value, True
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+        }
+
+
+# --- cache compartilhado entre workers (get_cache) ---
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # opcional: sem ele cai no json da stdlib
+    orjson = None
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def _loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class MemoryBackend:
+    """LRU em memória: cada worker tem o seu (sem invalidação entre workers)."""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.lru = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        self.lru.clear()
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        return [self.lru.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self.lru.set(key, value, ttl)
+
+    async def delete(self, keys: list[str]):
+        for key in keys:
+            self.lru.delete(key)
+
+    def stats(self) -> dict:
+        return self.lru.stats()
+
+
+class RedisBackend:
+    """Redis (ou qualquer servidor RESP, ex: bench/fake_redis.py) compartilhado.
+
+    Requer o pacote `redis`. Falhas do servidor viram miss / escrita perdida
+    (logadas): o cache nunca derruba a request.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        self.url = url
+        self.client = None
+        self.errors = 0
+
+    async def start(self):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis/tiered requer o pacote redis") from exc
+        # RESP2: funciona com qualquer versão de servidor (e com o fake do bench/)
+        self.client = redis.Redis.from_url(self.url, protocol=2)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def _failed(self, op: str, exc: Exception):
+        self.errors += 1
+        logger.warning("cache redis: %s falhou: %s", op, exc)
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        try:
+            return await self.client.mget(keys)
+        except Exception as exc:
+            self._failed("MGET", exc)
+            return [None] * len(keys)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        try:
+            await self.client.set(key, value, px=int(ttl * 1000))
+        except Exception as exc:
+            self._failed("SET", exc)
+
+    async def delete(self, keys: list[str]):
+        try:
+            await self.client.delete(*keys)
+        except Exception as exc:
+            self._failed("DEL", exc)
+
+    async def publish(self, channel: str, message: bytes):
+        try:
+            await self.client.publish(channel, message)
+        except Exception as exc:
+            self._failed("PUBLISH", exc)
+
+    def stats(self) -> dict:
+        return {"url": self.url, "errors": self.errors}
+
+
+class TieredBackend:
+    """L1 em memória (por worker) na frente de um L2 compartilhado.
+
+    Deleções vão para o L2 e são publicadas num canal pub/sub; cada worker
+    escuta o canal e derruba as chaves do seu L1. O TTL curto do L1 limita o
+    estrago de uma mensagem perdida, e ao reconectar o L1 é esvaziado.
+    """
+
+    name = "tiered"
+
+    def __init__(self, l1: MemoryBackend, l2: RedisBackend, channel: str):
+        self.l1 = l1
+        self.l2 = l2
+        self.channel = channel
+        self.origin = uuid.uuid4().hex  # ignora as próprias mensagens
+        self._listener: asyncio.Task | None = None
+        self.invalidations = 0
+        self.reconnects = 0
+
+    async def start(self):
+        await self.l2.start()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.l2.close()
+        await self.l1.close()
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        values = await self.l1.get_many(keys)
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if not missing:
+            return values
+        found = dict(zip(missing, await self.l2.get_many(missing)))
+        out = []
+        for key, value in zip(keys, values):
+            if value is None and found.get(key) is not None:
+                value = found[key]
+                self.l1.lru.set(key, value)
+            out.append(value)
+        return out
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.l2.set(key, value, ttl)
+        await self.l1.set(key, value, ttl)
+
+    async def delete(self, keys: list[str]):
+        await self.l1.delete(keys)
+        await self.l2.delete(keys)
+        await self.l2.publish(self.channel, _dumps({"origin": self.origin, "keys": keys}))
+
+    async def _listen(self):
+        backoff = 0.1
+        while True:
+            pubsub = self.l2.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                backoff = 0.1
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    data = _loads(message["data"])
+                    if data.get("origin") == self.origin:
+                        continue
+                    await self.l1.delete(data.get("keys", []))
+                    self.invalidations += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # mensagens podem ter se perdido enquanto estávamos fora
+                logger.warning("cache pub/sub caiu (%s); reconectando em %.1fs", exc, backoff)
+                self.reconnects += 1
+                self.l1.lru.clear()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "l1": self.l1.stats(),
+            "l2": self.l2.stats(),
+            "invalidations_received": self.invalidations,
+            "reconnects": self.reconnects,
+        }
+
+
+class Cache:
+    """Cache de payloads JSON com namespace, sobre um dos backends acima.
+
+    Valores precisam ser serializáveis em JSON (dicts montados pela rota,
+    datetimes como isoformat). None nunca é cacheado.
+    """
+
+    def __init__(self, backend, prefix: str, default_ttl: float):
+        self.backend = backend
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self._inflight: dict[str, asyncio.Future] = {}
+        # chaves invalidadas durante o próprio carregamento: o valor lido pode
+        # ser de antes da mudança e não é gravado (ver get_or_load)
+        self._stale_loads: set[str] = set()
+        self._stale_lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def key(self, namespace: str, ident: Any) -> str:
+        return f"{self.prefix}:{namespace}:{ident}"
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        await self.backend.start()
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.backend.close()
+        self._loop = None
+
+    async def get(self, namespace: str, ident: Any) -> Any:
+        raw = (await self.backend.get_many([self.key(namespace, ident)]))[0]
+        return None if raw is None else _loads(raw)
+
+    async def set(self, namespace: str, ident: Any, value: Any, ttl: float | None = None):
+        await self.backend.set(self.key(namespace, ident), _dumps(value), ttl or self.default_ttl)
+
+    async def delete(self, namespace: str, *idents: Any):
+        if idents:
+            keys = [self.key(namespace, i) for i in idents]
+            self._mark_stale(keys)
+            await self.backend.delete(keys)
+
+    def _mark_stale(self, keys: list[str]):
+        # chamado também de threads (invalidate), antes da deleção agendada
+        with self._stale_lock:
+            self._stale_loads.update(key for key in keys if key in self._inflight)
+
+    async def get_or_load(self, namespace: str, ident: Any, loader: Callable[[], Awaitable[Any]], ttl: float | None = None) -> Any:
+        # single-flight por worker, como TTLCache.get_or_load
+        key = self.key(namespace, ident)
+        while True:
+            raw = (await self.backend.get_many([key]))[0]
+            if raw is not None:
+                self.hits += 1
+                return _loads(raw)
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except _LeaderCancelled:
+                continue
+
+        self.misses += 1
+        fut = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = fut
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            fut.set_exception(_LeaderCancelled())
+            raise
+        except Exception as exc:
+            fut.set_exception(exc)
+            raise
+        else:
+            with self._stale_lock:
+                stale = key in self._stale_loads
+            # invalidado enquanto carregava: devolve o que leu, mas não grava
+            # (senão o payload de antes da mudança voltaria ao cache por um TTL)
+            if value is not None and not stale:
+                await self.backend.set(key, _dumps(value), ttl or self.default_ttl)
+            fut.set_result(value)
+        finally:
+            self._inflight.pop(key, None)
+            with self._stale_lock:
+                self._stale_loads.discard(key)
+        return value
+
+    def invalidate(self, namespace: str, *idents: Any):
+        """delete() para código síncrono (rotas sync no threadpool, eventos do ORM).
+
+        Fora do event loop espera o backend (a próxima leitura, em qualquer
+        worker, já não vê o valor antigo); dentro dele agenda a deleção.
+        Antes do start() (scripts, CLI) não faz nada.
+        """
+        loop = self._loop
+        if loop is None or not idents:
+            return
+        # marca já: a deleção em si pode rodar depois de um carregamento em voo terminar
+        self._mark_stale([self.key(namespace, i) for i in idents])
+        coro = self.delete(namespace, *idents)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            task = loop.create_task(coro)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(coro, loop).result(timeout=5)
+        except Exception as exc:
+            logger.warning("cache: invalidação de %s %s falhou: %s", namespace, idents, exc)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "store": self.backend.stats(),
+        }
+
+
+@lru_cache
+def get_cache() -> Cache:
+    settings = get_settings()
+    kind = settings.CACHE_BACKEND
+    if kind == "memory":
+        # sem invalidação entre workers: o TTL curto do L1 limita quanto um
+        # worker serve de contadores/livros desatualizados
+        backend = MemoryBackend(settings.CACHE_L1_SIZE, settings.CACHE_L1_TTL)
+    elif kind == "redis":
+        backend = RedisBackend(settings.CACHE_REDIS_URL)
+    elif kind == "tiered":
+        backend = TieredBackend(
+            MemoryBackend(settings.CACHE_L1_SIZE, settings.CACHE_L1_TTL),
+            RedisBackend(settings.CACHE_REDIS_URL),
+            channel=f"{settings.CACHE_KEY_PREFIX}:invalidate",
+        )
+    else:
+        raise ValueError(f"CACHE_BACKEND inválido: {kind!r} (memory, redis ou tiered)")
+    return Cache(backend, settings.CACHE_KEY_PREFIX, settings.CACHE_DEFAULT_TTL)
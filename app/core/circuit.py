@@ -0,0 +1,65 @@
+import time
+
+
+class CircuitBreaker:
+    """Circuit breaker por dependência externa (um por host da OpenLibrary).
+
+    closed: chamadas passam; `failure_threshold` falhas seguidas abrem o
+    circuito. open: chamadas falham na hora durante `reset_timeout`
+    segundos. half_open: uma única chamada de teste passa; sucesso fecha,
+    falha reabre. Só roda no event loop (sem lock).
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        self.rejected = 0
+
+    def retry_after(self) -> float:
+        # segundos até o circuito aceitar uma chamada de teste
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if self.retry_after() > 0:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                self.rejected += 1
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self._probing = False
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        # chamada abortada (cancelada) sem resultado: libera a vaga de teste
+        self._probing = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after": round(self.retry_after(), 1) if self.state == "open" else 0.0,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
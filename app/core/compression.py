@@ -0,0 +1,104 @@
+import gzip
+from starlette.datastructures import Headers, MutableHeaders
+from app.core.config import get_settings
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele só gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    # negociação pelo Accept-Encoding (com q-values); em empate preferimos br
+    prefs: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            prefs[token.strip().lower()] = q
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = prefs.get(encoding, prefs.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """Compressão br/gzip negociada, para corpos JSON/texto acima de COMPRESSION_MIN_SIZE.
+
+    Só comprime respostas de corpo único (todas as rotas JSON); streaming e
+    conteúdo já comprimido (capas JPEG) passam intactos. ETags fortes viram
+    fracas ao comprimir, já que os bytes mudam.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        settings = get_settings()
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            compressible = (
+                "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            )
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if not compressible or message.get("more_body", False) or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            passthrough = True
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
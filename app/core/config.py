@@ -6,6 +6,108 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # bcrypt: custo e pool de processos para hash/verify
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # pool de conexões do banco (sync e async; cada worker tem os seus)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # segundos; -1 desliga
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 = sem limite (Postgres)
+
+    # OpenLibrary (cliente http compartilhado); base configurável para o fake do bench/
+    OPENLIBRARY_BASE_URL: str = "https://openlibrary.org"
+    OPENLIBRARY_CONNECT_TIMEOUT: float = 5.0
+    OPENLIBRARY_READ_TIMEOUT: float = 15.0
+    OPENLIBRARY_MAX_CONNECTIONS: int = 20
+    OPENLIBRARY_MAX_KEEPALIVE: int = 10
+    OPENLIBRARY_KEEPALIVE_EXPIRY: float = 30.0
+    OPENLIBRARY_HTTP2: bool = False  # requer o pacote h2
+    OPENLIBRARY_MAX_CONCURRENCY: int = 10  # chamadas em voo por worker
+    OPENLIBRARY_QUEUE_TIMEOUT: float = 1.0  # espera máxima por uma vaga; depois 503
+    OPENLIBRARY_RETRIES: int = 2
+    OPENLIBRARY_RETRY_BACKOFF: float = 0.2  # base do backoff exponencial (com jitter)
+    OPENLIBRARY_RETRY_MAX_BACKOFF: float = 2.0
+    OPENLIBRARY_BREAKER_THRESHOLD: int = 5  # falhas seguidas que abrem o circuito
+    OPENLIBRARY_BREAKER_RESET: float = 30.0  # segundos aberto antes de testar de novo
+    OPENLIBRARY_COVERS_URL: str = "https://covers.openlibrary.org"
+
+    # proxy de capas (/covers): cache em disco e thumbnails
+    # origem pública das URLs de capa em BookPublic (ex. https://api.exemplo.com);
+    # vazio = derivada de cada request. Atrás de CDN/proxy, configure.
+    PUBLIC_BASE_URL: str = ""
+    COVER_CACHE_DIR: str = ".cache/covers"
+    COVER_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    COVER_THUMB_WORKERS: int = 2
+
+    # livros já gravados são servidos na hora; mais velhos que isso (fetched_at)
+    # são atualizados da OpenLibrary em background
+    BOOK_FRESHNESS_SECONDS: int = 7 * 24 * 3600
+    # leituras de livros velhos disparam a atualização em background; desligue
+    # quando o refresher em lote roda (em qualquer worker ou via cron/CLI)
+    BOOK_REFRESH_ON_READ: bool = True
+    # refresher em lote (app/services/book_refresh.py): no lifespan ou via
+    # `python -m app.services.book_refresh`; com vários workers, ligue em um só
+    # (ou use o CLI)
+    BOOK_REFRESH_ENABLED: bool = False
+    BOOK_REFRESH_BATCH: int = 50
+    BOOK_REFRESH_RATE: float = 5.0  # works buscados por segundo
+    BOOK_REFRESH_IDLE_INTERVAL: float = 60.0  # pausa quando não há o que atualizar
+    BOOK_REFRESH_INCOMPLETE_AFTER: int = 24 * 3600  # sem autor/capa: tenta de novo após
+    BOOK_REFRESH_RETRY_AFTER: int = 3600  # livro que um lote já tentou (p/ ex. falhou) volta à fila após
+
+    # cache de /books/search
+    SEARCH_CACHE_SIZE: int = 1024
+    SEARCH_CACHE_TTL: float = 300.0
+    # busca local: abaixo disso completa com a OpenLibrary
+    LOCAL_SEARCH_MIN_RESULTS: int = 5
+    LOCAL_SEARCH_SYNC_INTERVAL: float = 5.0  # segundos; índice em memória (não-Postgres)
+
+    # cache de livros/perfis (get_cache): memory = por worker, com o TTL do L1
+    # (outros workers não veem as invalidações); redis = compartilhado;
+    # tiered = L1 local na frente do redis, invalidado via pub/sub
+    CACHE_BACKEND: str = "memory"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_KEY_PREFIX: str = "bookreviews"
+    CACHE_DEFAULT_TTL: float = 300.0  # redis/tiered
+    CACHE_L1_SIZE: int = 10000
+    CACHE_L1_TTL: float = 5.0  # L1 do tiered e backend memory
+
+    # cache de usuários autenticados (por worker)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 60.0
+
+    # home timeline: autores com mais seguidores que isso não fazem fan-out
+    # na escrita; seus reviews entram no feed na leitura
+    TIMELINE_FANOUT_MAX_FOLLOWERS: int = 10000
+    TIMELINE_BACKFILL: int = 50  # reviews copiados ao seguir alguém
+
+    # cache http das leituras públicas (CDN); navegadores sempre revalidam via ETag
+    HTTP_CACHE_S_MAXAGE: int = 60
+    HTTP_CACHE_STALE_WHILE_REVALIDATE: int = 30
+
+    # compressão das respostas (br requer o pacote brotli)
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # likes em write-behind: buffer em memória gravado em lote (contagens
+    # atrasam até um intervalo; desligado = cada like é gravado na request)
+    LIKES_WRITE_BEHIND: bool = False
+    LIKES_FLUSH_INTERVAL: float = 1.0  # segundos
+    LIKES_BUFFER_MAX: int = 10000  # eventos pendentes que antecipam o flush
+    LIKES_FLUSH_MAX_RETRIES: int = 5  # flushes seguidos com falha antes de descartar o lote
+
+    # log de requests lentas com o SQL emitido (0 = desligado)
+    SLOW_REQUEST_MS: int = 0
+
+    # endpoints /internal (header X-Internal-Token); sem token configurado respondem 404
+    INTERNAL_TOKEN: str | None = None
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -14,4 +116,4 @@ class Settings(BaseSettings):
 
 @lru_cache
 def get_settings() -> Settings:
-    return Settings()
\ No newline at end of file
+    return Settings()
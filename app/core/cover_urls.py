@@ -0,0 +1,59 @@
+import re
+from contextvars import ContextVar
+from functools import lru_cache
+from starlette.requests import Request
+from app.core.config import get_settings
+
+_OPENLIBRARY_COVER_RE = re.compile(r"/b/id/(\d+)-[SML]\.jpg$")
+
+# origem (scheme://host[/root_path]) da request corrente, usada quando
+# PUBLIC_BASE_URL não está configurado; o threadpool das rotas sync copia o contexto
+request_base_url: ContextVar[str] = ContextVar("request_base_url", default="")
+
+
+def cover_id_from_url(url: str) -> int | None:
+    # https://covers.openlibrary.org/b/id/123-L.jpg -> 123
+    m = _OPENLIBRARY_COVER_RE.search(url)
+    return int(m.group(1)) if m else None
+
+
+def public_base_url() -> str:
+    return (get_settings().PUBLIC_BASE_URL or request_base_url.get()).rstrip("/")
+
+
+def proxy_cover_url(url: str | None, size: str = "M") -> str | None:
+    # reescreve capas da OpenLibrary para o nosso /covers (URL absoluta: o
+    # frontend roda em outra origem); outras URLs passam intactas
+    if not url:
+        return url
+    return _proxy_cover_url(url, size, public_base_url())
+
+
+@lru_cache(maxsize=16384)
+def _proxy_cover_url(url: str, size: str, base: str) -> str:
+    # memoizado: roda no validator de BookPublic, uma vez por item de cada página
+    cover_id = cover_id_from_url(url)
+    if cover_id is None:
+        return url
+    return f"{base}/covers/{cover_id}?size={size}"
+
+
+class BaseURLMiddleware:
+    """Guarda a origem de cada request para as URLs absolutas das capas.
+
+    Atrás de proxy, rode o uvicorn com --proxy-headers (scheme correto) ou
+    configure PUBLIC_BASE_URL, que tem precedência.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or get_settings().PUBLIC_BASE_URL:
+            await self.app(scope, receive, send)
+            return
+        token = request_base_url.set(str(Request(scope).base_url))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_base_url.reset(token)
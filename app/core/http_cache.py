@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+from app.core.config import get_settings
+
+
+def _utc(dt: datetime) -> datetime:
+    # o SQLite devolve datetimes sem tz (gravados em UTC)
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def make_etag(*parts) -> str:
+    # fraca (W/): identifica a versão do recurso, não os bytes exatos do JSON
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def cache_control(private: bool = False) -> str:
+    if private:
+        return "private, no-cache"
+    # navegador sempre revalida (304 barato); CDN segura por HTTP_CACHE_S_MAXAGE
+    settings = get_settings()
+    return (
+        f"public, max-age=0, s-maxage={settings.HTTP_CACHE_S_MAXAGE}, "
+        f"stale-while-revalidate={settings.HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+    )
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # comparação fraca (RFC 9110 13.1.2)
+    if header.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def has_validator(request: Request) -> bool:
+    # sem validador não há 304 possível: a rota pode tirar o ETag do que já carregou
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match tem precedência sobre If-Modified-Since
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _utc(last_modified).replace(microsecond=0) <= _utc(since)
+    return False
+
+
+def conditional(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: datetime | None = None,
+    private: bool = False,
+    vary_auth: bool = False,
+) -> Response | None:
+    """Aplica ETag / Last-Modified / Cache-Control à resposta da rota.
+
+    Retorna um 304 (sem corpo) para devolver direto quando a versão do
+    cliente ainda vale; senão None e a rota segue montando o payload.
+    private: o corpo é do usuário logado. vary_auth: o corpo depende do
+    token (ex: ?expand=viewer), mesmo quando a resposta anônima é pública.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control(private)}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_utc(last_modified), usegmt=True)
+    if private or vary_auth:
+        headers["Vary"] = "Authorization"
+    response.headers.update(headers)
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return None
@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from sqlalchemy import event
+from app.core.config import get_settings
+
+logger = logging.getLogger("app.metrics")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+MAX_LOGGED_STATEMENTS = 100
+
+
+def _fmt_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for n, v in zip(names, values):
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{n}="{v}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_fmt_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [contagem por bucket..., soma, total]
+        self._values: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            data = self._values.get(labels)
+            if data is None:
+                data = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for labels, data in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, data):
+                    lines.append(f"{self.name}_bucket{_fmt_labels(names, labels + (bound,))} {count}")
+                lines.append(f"{self.name}_bucket{_fmt_labels(names, labels + ('+Inf',))} {data[-1]}")
+                lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, labels)} {data[-2]}")
+                lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, labels)} {data[-1]}")
+        return lines
+
+
+REGISTRY: list = []
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Latência das requests por rota", ("method", "route", "status"))
+http_request_queries = Histogram(
+    "http_request_db_queries", "Queries SQL por request", ("method", "route"), buckets=COUNT_BUCKETS)
+http_request_db_time = Histogram(
+    "http_request_db_seconds", "Tempo total de banco por request", ("method", "route"))
+openlibrary_duration = Histogram(
+    "openlibrary_request_duration_seconds", "Latência das chamadas à OpenLibrary", ("endpoint",))
+openlibrary_errors = Counter(
+    "openlibrary_errors_total", "Erros nas chamadas à OpenLibrary", ("endpoint", "kind"))
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_time: float = 0.0
+    statements: list[str] | None = field(default=None)
+
+
+# estatísticas da request corrente; o threadpool das rotas sync copia o contexto,
+# então o mesmo objeto é visto pelo handler e pelos eventos do SQLAlchemy
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+def instrument_engine(engine):
+    # o início fica no contexto de execução (um por statement): um statement
+    # que falha não chega ao after_cursor_execute e o contexto vai embora com
+    # ele, sem deixar lixo na conexão (que volta para o pool)
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_metrics_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        stats = current_request.get()
+        if stats is None:
+            return
+        stats.queries += 1
+        stats.db_time += elapsed
+        if stats.statements is not None and len(stats.statements) < MAX_LOGGED_STATEMENTS:
+            stats.statements.append(f"[{elapsed * 1000:.1f}ms] {statement}")
+
+
+class MetricsMiddleware:
+    """Latência por rota (template, não o path cru), queries e tempo de banco.
+
+    Com SLOW_REQUEST_MS > 0, requests mais lentas que isso são logadas com
+    os statements SQL que emitiram.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        slow_ms = get_settings().SLOW_REQUEST_MS
+        stats = RequestStats(statements=[] if slow_ms > 0 else None)
+        token = current_request.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_request_duration.observe(elapsed, method, route_path, status)
+            http_request_queries.observe(stats.queries, method, route_path)
+            http_request_db_time.observe(stats.db_time, method, route_path)
+            if slow_ms > 0 and elapsed * 1000 >= slow_ms:
+                logger.warning(
+                    "slow request %s %s: %.1fms, %d queries, %.1fms db\n%s",
+                    method, scope["path"], elapsed * 1000, stats.queries, stats.db_time * 1000,
+                    "\n".join(stats.statements or []),
+                )
@@ -0,0 +1,65 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _cursor_value(column, value):
+    # cada valor tem de casar com o tipo da coluna: um cursor forjado vira
+    # 400 aqui, e não um erro de tipo no banco (500)
+    python_type = column.type.python_type
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise ValueError
+        return datetime.fromisoformat(value)
+    if type(value) is not python_type:
+        raise ValueError
+    return value
+
+
+def decode_cursor(cursor: str, columns) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_cursor_value(col, v) for col, v in zip(columns, values)]
+    except (ValueError, TypeError, NotImplementedError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_page(query, columns, cursor: str | None, limit: int, offset: int = 0, descending: bool = True):
+    """Ordena por `columns` e aplica a página.
+
+    Com `cursor` usa keyset (`(col1, col2) < cursor`), custo constante em
+    qualquer profundidade; sem cursor cai no limit/offset antigo. Busca
+    limit + 1 linhas para saber se existe próxima página (ver finish_page).
+    """
+    query = query.order_by(*(c.desc() if descending else c.asc() for c in columns))
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+    elif offset:
+        query = query.offset(offset)
+    return query.limit(limit + 1)
+
+
+def finish_page(rows, columns, limit: int, response: Response, key=None):
+    # key: extrai os valores do cursor da última linha (padrão: atributos com o nome das colunas)
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        values = key(last) if key else [getattr(last, c.key) for c in columns]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*values)
+    return rows
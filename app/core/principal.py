@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from sqlalchemy import event
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    # usuário autenticado sem sessão/ORM; suficiente para quem só precisa de .id
+    id: int
+    name: str
+    email: str
+    bio: str | None
+    created_at: datetime | None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, name=user.name, email=user.email, bio=user.bio, created_at=user.created_at)
+
+
+@lru_cache
+def get_principal_cache() -> TTLCache:
+    settings = get_settings()
+    return TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+
+def load_principal(db, user_id: int) -> Principal | None:
+    cache = get_principal_cache()
+    principal = cache.get(user_id)
+    if principal is None:
+        user = db.get(User, user_id)
+        if not user:
+            return None
+        principal = Principal.from_user(user)
+        cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: int):
+    get_principal_cache().delete(user_id)
+
+
+# qualquer alteração/remoção de User via ORM derruba a entrada do cache
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    invalidate_principal(target.id)
@@ -0,0 +1,40 @@
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # opcional: sem ele cai no jsonable_encoder + json da stdlib
+    orjson = None
+
+# headers da response "injetada" na rota que não fazem sentido copiar
+_SKIP_HEADERS = {"content-length", "content-type"}
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON de dicts/listas já montados pela rota (sem response_model).
+
+    Datetimes UTC saem com "Z", como no pydantic.
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            # o json da stdlib não serializa datetime/Decimal das colunas
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def _headers(response: Response | None) -> dict | None:
+    if response is None:
+        return None
+    return {k: v for k, v in response.headers.items() if k not in _SKIP_HEADERS}
+
+
+def json_rows(content, response: Response | None = None) -> ORJSONResponse:
+    """JSON de dicts montados a partir de colunas já tipadas pelo banco.
+
+    Devolver um Response pula o response_model/jsonable_encoder do FastAPI
+    (o response_model pode ficar na rota, só para o OpenAPI). Headers já
+    setados na `response` injetada (X-Next-Cursor, ETag, ...) são copiados.
+    """
+    return ORJSONResponse(content, headers=_headers(response))
@@ -1,15 +1,85 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from fastapi import HTTPException
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import get_settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+
+@lru_cache
+def _context(rounds: int) -> CryptContext:
+    # hashes com custo menor que `rounds` são marcados para rehash (needs_update)
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+
+def _hash(plain: str, rounds: int) -> str:
+    return _context(rounds).hash(plain)
+
+
+def _verify(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+
 def hash_password(plain: str) -> str:
-    return pwd_context.hash(plain)
+    return _hash(plain, get_settings().BCRYPT_ROUNDS)
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return _verify(plain, hashed)
+
+
+class PasswordHasher:
+    """bcrypt fora do event loop, num pool de processos.
+
+    O pool limita a concorrência; acima de PASSWORD_HASH_MAX_PENDING
+    chamadas (em execução + na fila) responde 503 na hora em vez de enfileirar.
+    """
+
+    def __init__(self):
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending = 0
+
+    def start(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=get_settings().PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+    async def _run(self, fn, *args):
+        if self._pending >= get_settings().PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(status_code=503, detail="Servidor ocupado, tente novamente", headers={"Retry-After": "1"})
+        self.start()
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, plain: str) -> str:
+        return await self._run(_hash, plain, get_settings().BCRYPT_ROUNDS)
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        return await self._run(_verify, plain, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return _context(get_settings().BCRYPT_ROUNDS).needs_update(hashed)
+
+    def stats(self) -> dict:
+        return {"pending": self._pending, "max_pending": get_settings().PASSWORD_HASH_MAX_PENDING}
+
+
+password_hasher = PasswordHasher()
+
 
 def create_access_token(subject: str, expires_minutes: int | None = None) -> str:
     settings = get_settings()
@@ -17,4 +87,4 @@ def create_access_token(subject: str, expires_minutes: int | None = None) -> str
         minutes=expires_minutes or settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
     to_encode = {"sub": subject, "exp": expire}
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -1,13 +1,73 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import functions
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
+from app.core.config import get_settings
+from app.core.metrics import instrument_engine
+from app.db.pool import TimedQueuePool, TimedAsyncQueuePool
 
 load_dotenv()  # carrega variáveis do .env
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# drivers async equivalentes aos drivers sync de DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP grava 'YYYY-MM-DD HH:MM:SS', mas o SQLAlchemy binda
+    # datetimes como 'YYYY-MM-DD HH:MM:SS.ffffff'. No SQLite as comparações são
+    # de texto (cursores keyset!), então now() grava no mesmo formato
+    return "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+def to_async_url(url: str):
+    u = make_url(url)
+    return u.set(drivername=ASYNC_DRIVERS.get(u.get_backend_name(), u.drivername))
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+
+def engine_options(url, is_async: bool = False) -> dict:
+    # pool e statement_timeout vindos de Settings; SQLite fica com o pool padrão
+    u = make_url(url)
+    if u.get_backend_name() == "sqlite":
+        return {}
+    settings = get_settings()
+    options = {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    timeout = settings.DB_STATEMENT_TIMEOUT_MS
+    if timeout and u.get_backend_name() == "postgresql":
+        if u.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# engine/sessões async para as rotas async def (não bloqueiam o event loop)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 Base = declarative_base()
@@ -0,0 +1,184 @@
+"""Checagem de planos de execução das queries quentes das rotas.
+
+Cria o schema num banco descartável, popula com dados sintéticos, roda
+EXPLAIN em cada query e falha (exit 1) se alguma fizer full scan ou sort
+de tabela inteira. Uso:
+
+    python -m app.db.explain_check                       # SQLite em memória
+    python -m app.db.explain_check postgresql://.../scratch
+
+O banco passado é populado: use um banco vazio, nunca o de produção.
+"""
+import json
+import random
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, event, insert, text
+
+from app.core.pagination import encode_cursor
+from app.db.database import Base
+import app.db.init_db  # noqa: F401  registra todos os models
+from app.models.book import Book
+from app.models.comment import Comment
+from app.models.follow import Follow
+from app.models.review import Review
+from app.models.review_like import ReviewLike
+from app.models.user import User
+from app.services import queries
+from app.services.timeline import high_fanout_ids_stmt
+
+N_USERS = 500
+N_BOOKS = 300
+N_REVIEWS = 5000
+CHECKED_TABLES = {"reviews", "follows", "comments", "review_likes", "timeline_entries", "users", "books"}
+# merge de vários autores (IN): ordena só as reviews deles, lidas pelo
+# índice (user_id, created_at, id); o sort é do range, não da tabela
+SORT_ALLOWED = {"following_feed (autores)", "following_feed (autores) (cursor)"}
+
+
+def seed(engine):
+    rnd = random.Random(42)
+    now = datetime.now(tz=timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "name": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x"}
+            for i in range(1, N_USERS + 1)
+        ])
+        conn.execute(insert(Book), [{"id": f"OL{i}W", "title": f"Book {i}"} for i in range(1, N_BOOKS + 1)])
+        pairs = {(rnd.randint(1, N_USERS), rnd.randint(1, N_BOOKS)) for _ in range(N_REVIEWS)}
+        conn.execute(insert(Review), [
+            {"id": i, "user_id": u, "book_id": f"OL{b}W", "rating": rnd.randint(1, 5), "content": "x",
+             "created_at": now - timedelta(minutes=i)}
+            for i, (u, b) in enumerate(pairs, start=1)
+        ])
+        follows = {(a, b) for a, b in ((rnd.randint(1, N_USERS), rnd.randint(1, N_USERS)) for _ in range(N_USERS * 20)) if a != b}
+        conn.execute(insert(Follow), [{"follower_id": a, "following_id": b} for a, b in follows])
+        n_reviews = len(pairs)
+        conn.execute(insert(Comment), [
+            {"review_id": rnd.randint(1, n_reviews), "user_id": rnd.randint(1, N_USERS), "content": "x"}
+            for _ in range(N_REVIEWS * 2)
+        ])
+        likes = {(rnd.randint(1, n_reviews), rnd.randint(1, N_USERS)) for _ in range(N_REVIEWS * 3)}
+        conn.execute(insert(ReviewLike), [{"review_id": r, "user_id": u} for r, u in likes])
+        conn.execute(text(
+            "INSERT INTO timeline_entries (user_id, review_id, author_id, created_at) "
+            "SELECT f.follower_id, r.id, r.user_id, r.created_at FROM follows f JOIN reviews r ON r.user_id = f.following_id"
+        ))
+        conn.execute(text("ANALYZE"))
+
+
+def route_queries():
+    # os mesmos builders que as rotas executam (app/services/queries.py);
+    # cada listagem entra na primeira página (sem cursor) e numa seguinte
+    after = encode_cursor(datetime.now(tz=timezone.utc), 10**9)
+    pages = {
+        "recent_reviews": (lambda c: queries.reviews_page((), queries.REVIEW_ORDER, c, 20), after),
+        "recent_reviews (etag)": (lambda c: queries.review_versions_page((), queries.REVIEW_ORDER, c, 20), after),
+        "get_user_reviews": (lambda c: queries.reviews_page(queries.by_user(1), queries.REVIEW_ORDER, c, 20), after),
+        "get_user_reviews (etag)": (
+            lambda c: queries.review_versions_page(queries.by_user(1), queries.REVIEW_ORDER, c, 20), after,
+        ),
+        "list_reviews_by_book": (
+            lambda c: queries.reviews_page(queries.by_book("OL1W"), queries.BOOK_REVIEW_ORDER, c, 20),
+            encode_cursor(10**9),
+        ),
+        "following_feed": (lambda c: queries.timeline_page(1, [], c, 20), after),
+        "following_feed (fan-out-on-read)": (lambda c: queries.timeline_page(1, [2, 3], c, 20), after),
+        "following_feed (autores)": (lambda c: queries.author_reviews_page([2, 3], c, 20), after),
+        "list_comments": (lambda c: queries.comments_page(1, c, 10), encode_cursor(0)),
+    }
+    found = {}
+    for name, (build, cursor) in pages.items():
+        found[name] = build(None)
+        found[f"{name} (cursor)"] = build(cursor)
+    return found | {
+        "get_review (etag)": queries.review_version_stmt(1),
+        "list_followers": queries.followers_stmt(1),
+        "list_following": queries.following_stmt(1),
+        "high_fanout_followees": high_fanout_ids_stmt(),
+        "high_fanout_followees (seguidos)": queries.followed_ids_stmt(1, [2, 3, 4]),
+        "count_likes_batch": queries.like_counts_stmt([1, 2, 3]),
+        "liked_by_me_batch": queries.liked_review_ids_stmt(1, [1, 2, 3]),
+        "follow_status_batch": queries.followed_ids_stmt(1, [2, 3, 4]),
+    }
+
+
+@contextmanager
+def explaining(engine, prefix: str):
+    # executa o statement real (com binds processados) prefixado por EXPLAIN
+    def add_prefix(conn, cursor, statement, parameters, context, executemany):
+        return prefix + statement, parameters
+
+    event.listen(engine, "before_cursor_execute", add_prefix, retval=True)
+    try:
+        yield
+    finally:
+        event.remove(engine, "before_cursor_execute", add_prefix)
+
+
+def _sqlite_problems(rows, allow_sort: bool = False) -> list[str]:
+    problems = []
+    for row in rows:
+        detail = row[-1]
+        words = detail.split()
+        if words[:1] == ["SCAN"] and "USING" not in words and words[1] in CHECKED_TABLES:
+            problems.append(detail)
+        # range só na PK (rowid>? / rowid<?) percorre a tabela em ordem de id
+        if "INTEGER PRIMARY KEY (rowid>?)" in detail or "INTEGER PRIMARY KEY (rowid<?)" in detail:
+            problems.append(detail)
+        if "TEMP B-TREE" in detail and not allow_sort:
+            problems.append(detail)
+    return problems
+
+
+def _pg_problems(rows, allow_sort: bool = False) -> list[str]:
+    problems = []
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in CHECKED_TABLES:
+            problems.append(f"Seq Scan on {node['Relation Name']}")
+        if node.get("Node Type") == "Sort" and not allow_sort:
+            problems.append(f"Sort ({', '.join(node.get('Sort Key', []))})")
+        for child in node.get("Plans", []):
+            walk(child)
+
+    plan = rows[0][0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    walk(plan[0]["Plan"])
+    return problems
+
+
+def check(url: str = "sqlite://") -> dict[str, list[str]]:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    seed(engine)
+
+    is_pg = engine.dialect.name == "postgresql"
+    prefix = "EXPLAIN (FORMAT JSON) " if is_pg else "EXPLAIN QUERY PLAN "
+    failures = {}
+    with engine.connect() as conn:
+        if is_pg:
+            # com poucas linhas o planner prefere seq scan; aqui queremos saber se há índice utilizável
+            conn.execute(text("SET enable_seqscan = off"))
+            conn.execute(text("SET enable_sort = off"))
+        with explaining(engine, prefix):
+            for name, stmt in route_queries().items():
+                rows = conn.execute(stmt).cursor.fetchall()
+                allow_sort = name in SORT_ALLOWED
+                problems = _pg_problems(rows, allow_sort) if is_pg else _sqlite_problems(rows, allow_sort)
+                if problems:
+                    failures[name] = problems
+    engine.dispose()
+    return failures
+
+
+if __name__ == "__main__":
+    failures = check(sys.argv[1] if len(sys.argv) > 1 else "sqlite://")
+    for name, problems in failures.items():
+        print(f"FAIL {name}: {'; '.join(problems)}")
+    if failures:
+        sys.exit(1)
+    print("OK: nenhuma query faz full scan")
@@ -1,16 +1,19 @@
 from app.db.database import Base, engine
+from app.db.migrate import upgrade
 from app.models.user import User
 from app.models.book import Book
+from app.models.author import Author
 from app.models.review import Review
 from app.models.comment import Comment
 from app.models.review_like import ReviewLike
 from app.models.follow import Follow
+from app.models.timeline import TimelineEntry
 
 
 def init_db():
     print("Conectando ao banco...")
     print(engine.url)  
-    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
 
 
 if __name__ == "__main__":
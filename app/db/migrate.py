@@ -0,0 +1,62 @@
+from sqlalchemy import DateTime, inspect, text
+from sqlalchemy.sql.elements import ClauseElement
+from app.db.database import Base
+
+
+def _column_ddl(column, dialect) -> str:
+    ddl = f"{column.name} {column.type.compile(dialect=dialect)}"
+    default = column.server_default
+    if default is not None:
+        arg = default.arg
+        if isinstance(arg, ClauseElement):
+            if dialect.name == "sqlite":
+                # SQLite só aceita default constante em ADD COLUMN: a coluna fica
+                # nula nas linhas existentes (e sem default)
+                return ddl
+            ddl += f" DEFAULT {arg.compile(dialect=dialect)}"
+        else:
+            ddl += f" DEFAULT '{arg}'"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    return ddl
+
+
+def add_missing_columns(conn):
+    # create_all não altera tabelas existentes; adiciona colunas novas dos models.
+    # Só colunas com server_default podem ser NOT NULL aqui.
+    insp = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        existing = {c["name"] for c in insp.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(column, conn.dialect)}"))
+
+
+def add_missing_indexes(conn):
+    # idem para índices declarados em __table_args__ depois da criação da tabela
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def normalize_sqlite_timestamps(conn):
+    # linhas gravadas com CURRENT_TIMESTAMP (sem fração) ganham o formato com
+    # microssegundos que o SQLAlchemy usa nos binds (ver app/db/database.py)
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            if isinstance(column.type, DateTime):
+                conn.execute(text(
+                    f"UPDATE {table.name} SET {column.name} = {column.name} || '.000000' "
+                    f"WHERE length({column.name}) = 19"
+                ))
+
+
+def upgrade(engine):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        add_missing_columns(conn)
+        add_missing_indexes(conn)
+        if conn.dialect.name == "sqlite":
+            normalize_sqlite_timestamps(conn)
@@ -0,0 +1,70 @@
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolWaitStats:
+    # tempo de espera no checkout de conexões (inclui abrir conexão nova quando há vaga)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+class _TimedMixin:
+    wait_stats: PoolWaitStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return conn
+
+
+# stats no nível da classe: sobrevivem ao pool.recreate() do engine.dispose()
+class TimedQueuePool(_TimedMixin, QueuePool):
+    wait_stats = PoolWaitStats()
+
+
+class TimedAsyncQueuePool(_TimedMixin, AsyncAdaptedQueuePool):
+    wait_stats = PoolWaitStats()
+
+
+def pool_status(pool) -> dict:
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),   # idle
+            overflow=max(pool.overflow(), 0),  # o contador interno começa em -pool_size
+            timeout=pool.timeout(),
+        )
+    if isinstance(pool, _TimedMixin):
+        status.update(pool.wait_stats.snapshot())
+    return status
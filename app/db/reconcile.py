@@ -0,0 +1,53 @@
+from sqlalchemy import select, update, func
+from app.db.database import SessionLocal
+import app.db.init_db  # noqa: F401  registra todos os models
+from app.models.book import Book
+from app.models.user import User
+from app.models.review import Review
+from app.models.comment import Comment
+from app.models.review_like import ReviewLike
+from app.models.follow import Follow
+
+
+def _count(col, where):
+    return select(func.count(col)).where(where).scalar_subquery()
+
+
+def reconcile_counters(db):
+    # recalcula em lote todos os contadores denormalizados
+    db.execute(
+        update(Review).values(
+            like_count=_count(ReviewLike.id, ReviewLike.review_id == Review.id),
+            comment_count=_count(Comment.id, Comment.review_id == Review.id),
+        ).execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(User).values(
+            follower_count=_count(Follow.id, Follow.following_id == User.id),
+            following_count=_count(Follow.id, Follow.follower_id == User.id),
+            review_count=_count(Review.id, Review.user_id == User.id),
+        ).execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def reconcile_book_stats(db):
+    # recalcula em lote os agregados de nota de todos os livros
+    def ratings(where):
+        return select(func.count(Review.id)).where(Review.book_id == Book.id, where).scalar_subquery()
+
+    db.execute(
+        update(Book).values(
+            review_count=_count(Review.id, Review.book_id == Book.id),
+            rating_sum=select(func.coalesce(func.sum(Review.rating), 0)).where(Review.book_id == Book.id).scalar_subquery(),
+            **{f"rating_{n}": ratings(Review.rating == n) for n in range(1, 6)},
+        ).execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+if __name__ == "__main__":
+    with SessionLocal() as session:
+        reconcile_counters(session)
+        reconcile_book_stats(session)
+    print("Contadores reconciliados")
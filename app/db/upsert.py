@@ -0,0 +1,10 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def insert_for(dialect_name: str, table):
+    # INSERT com suporte a ON CONFLICT no dialeto em uso (Postgres em prod, SQLite nos testes)
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    if dialect_name == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"ON CONFLICT não suportado para o dialeto {dialect_name}")
@@ -1,4 +1,7 @@
-from app.db.database import SessionLocal
+import secrets
+from fastapi import Header, HTTPException, Query
+from app.db.database import SessionLocal, AsyncSessionLocal
+from app.core.config import get_settings
 
 def get_db():
     db = SessionLocal()
@@ -6,3 +9,23 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+MAX_BATCH_IDS = 100
+
+def id_batch(ids: list[int] = Query(..., description="IDs repetidos na query string: ?ids=1&ids=2")) -> list[int]:
+    ids = list(dict.fromkeys(ids))  # remove duplicados mantendo a ordem
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return ids
+
+def require_internal(x_internal_token: str | None = Header(default=None)):
+    token = get_settings().INTERNAL_TOKEN
+    if not token:
+        # sem token configurado os endpoints nem existem
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_internal_token is None or not secrets.compare_digest(x_internal_token, token):
+        raise HTTPException(status_code=403, detail="Forbidden")
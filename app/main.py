@@ -1,8 +1,46 @@
+import math
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, books, reviews, comments, users, review_likes, follows
+from app.routes import auth, books, covers, reviews, comments, users, review_likes, follows, internal
+from app.core import metrics
+from app.core.cache import get_cache
+from app.core.compression import CompressionMiddleware
+from app.core.cover_urls import BaseURLMiddleware
+from app.core.config import get_settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.db.database import async_engine
+from app.core.security import password_hasher
+from app.services.openlibrary import UpstreamUnavailable, openlibrary
+from app.services.covers import cover_store
+from app.services.book_refresh import book_refresher
+from app.services.likes import like_buffer
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await openlibrary.start()
+    password_hasher.start()
+    cover_store.start()
+    await get_cache().start()
+    if get_settings().BOOK_REFRESH_ENABLED:
+        book_refresher.start()
+    if get_settings().LIKES_WRITE_BEHIND:
+        like_buffer.start()
+    try:
+        yield
+    finally:
+        await like_buffer.close()  # antes do engine: grava o que sobrou
+        await book_refresher.close()
+        await openlibrary.close()
+        password_hasher.close()
+        cover_store.close()
+        await get_cache().close()
+        await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -10,16 +48,35 @@ app.add_middleware(
     allow_credentials = True,
     allow_methods = ["*"],
     allow_headers = ["*"],
+    expose_headers = [NEXT_CURSOR_HEADER],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(BaseURLMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable(request, exc: UpstreamUnavailable):
+    # OpenLibrary fora/lenta: 503 rápido em vez de um 500 depois do timeout
+    return JSONResponse(
+        {"detail": "OpenLibrary indisponível no momento, tente novamente"},
+        status_code=503,
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
 
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(auth.router)
 app.include_router(books.router)
+app.include_router(covers.router)
 app.include_router(reviews.router)
 app.include_router(comments.router)
 app.include_router(users.router)
 app.include_router(review_likes.router)
-app.include_router(follows.router)
\ No newline at end of file
+app.include_router(follows.router)
+app.include_router(internal.router)
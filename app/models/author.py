@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, DateTime, func
+from app.db.database import Base
+
+class Author(Base):
+    # cache dos nomes de /authors/{key}.json da OpenLibrary
+    __tablename__ = "authors"
+
+    id = Column(String, primary_key=True)  # openlibrary author key, ex: OL23919A
+    name = Column(String, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
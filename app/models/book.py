@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, func
+from sqlalchemy import DDL, Column, Integer, String, DateTime, Index, Text, event, func, literal_column
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -9,6 +9,52 @@ class Book(Base):
     title = Column(String, nullable=False, index=True)
     author = Column(String, index=True, nullable=True)
     cover_url = Column(String, nullable=True)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
+    # última leitura dos metadados na OpenLibrary (frescor); updated_at é a
+    # versão do livro (ETags) e também anda com os agregados de nota
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # último lote do refresher que pegou o livro (com sucesso ou não)
+    refresh_attempted_at = Column(DateTime(timezone=True), nullable=True)
+
+    # agregados de nota, mantidos incrementalmente pelas rotas de review
+    review_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5 = Column(Integer, nullable=False, default=0, server_default="0")
 
     reviews = relationship("Review", back_populates="book", cascade="all, delete-orphan")
+
+    @property
+    def rating_avg(self) -> float | None:
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
+    @property
+    def rating_histogram(self) -> dict[int, int]:
+        return {n: getattr(self, f"rating_{n}") for n in range(1, 6)}
+
+
+# texto da busca local (título + autor). Literais inline, e não binds, para que
+# o planner do Postgres case as queries com a expressão do índice abaixo.
+book_search_text = func.lower(
+    Book.title + literal_column("' '") + func.coalesce(Book.author, literal_column("''"))
+)
+
+# busca por substring / fuzzy (pg_trgm); em outros bancos a busca local usa
+# o índice em memória de app/services/search.py
+Index(
+    "ix_books_search_trgm",
+    book_search_text.label("search_text"),
+    postgresql_using="gin",
+    postgresql_ops={"search_text": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
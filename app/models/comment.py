@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -12,5 +12,7 @@ class Comment(Base):
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (Index("ix_comments_review_id", "review_id", "id"),)
+
     review = relationship("Review", back_populates="comments")
     user = relationship("User", back_populates="comments")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, DateTime, func, CheckConstraint
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, DateTime, func, CheckConstraint, Index
 from app.db.database import Base
 
 class Follow(Base):
@@ -12,4 +12,6 @@ class Follow(Base):
     __table_args__ = (
         UniqueConstraint("follower_id", "following_id", name="uq_follow_pair"),
         CheckConstraint("follower_id <> following_id", name="ck_no_self_follow"),
+        # seguidores de um usuário; (follower_id, ...) já é coberto por uq_follow_pair
+        Index("ix_follows_following", "following_id", "follower_id"),
         )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, Text, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, Index, Text, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -12,13 +12,27 @@ class Review(Base):
     content = Column(Text, nullable=True)
     rating = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # contadores denormalizados (ver app/services/counters.py)
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     __table_args__ = (
         CheckConstraint("rating >= 1 AND rating <= 5", name="ck_reviews_rating_1_5"),
         UniqueConstraint("user_id", "book_id", name="uq_review_user_book"),
+        # feed geral, reviews por usuário e por livro (ver app/db/explain_check.py)
+        Index("ix_reviews_created_at_id", "created_at", "id"),
+        Index("ix_reviews_user_created", "user_id", "created_at", "id"),
+        Index("ix_reviews_book_id", "book_id", "id"),
     )
 
     user = relationship("User", back_populates="reviews")
     book = relationship("Book", back_populates="reviews")
     comments = relationship("Comment", back_populates="review", cascade="all, delete-orphan")
     likes = relationship("ReviewLike", back_populates="review", cascade="all, delete-orphan")
+
+
+# versão do review para ETag/Last-Modified; updated_at é nulo nas linhas
+# anteriores à coluna (o SQLite não aceita ADD COLUMN com DEFAULT now())
+review_version = func.coalesce(Review.updated_at, Review.created_at)
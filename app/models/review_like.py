@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -9,6 +9,9 @@ class ReviewLike(Base):
     review_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
-    __table_args__ = (UniqueConstraint("review_id", "user_id", name="uq_like_review_user"),)
+    __table_args__ = (
+        UniqueConstraint("review_id", "user_id", name="uq_like_review_user"),
+        Index("ix_review_likes_user", "user_id", "review_id"),
+    )
 
     review = relationship("Review", back_populates="likes")
\ No newline at end of file
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from app.db.database import Base
+
+class TimelineEntry(Base):
+    # home timeline materializada (fan-out-on-write): uma linha por (leitor, review)
+    __tablename__ = "timeline_entries"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    review_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), primary_key=True)
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_timeline_user_created", "user_id", "created_at", "review_id"),
+        Index("ix_timeline_user_author", "user_id", "author_id"),
+    )
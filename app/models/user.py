@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import Column, Integer, String, DateTime, func, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -12,5 +12,15 @@ class User(Base):
     bio = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # contadores denormalizados (ver app/services/counters.py)
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    review_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     reviews = relationship("Review", back_populates="user", cascade="all, delete-orphan")
     comments = relationship("Comment", back_populates="user", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # autores acima do limite de fan-out (app/services/timeline.py)
+        Index("ix_users_follower_count", "follower_count"),
+    )
@@ -1,57 +1,94 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 
 from app.db.database import SessionLocal
 from app.models.user import User
 from app.schemas.user import UserCreate, UserPublic, Token
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import password_hasher, create_access_token
 from app.core.config import get_settings
-from app.dependencies import get_db
+from app.core.principal import Principal, load_principal
+from app.dependencies import get_db, get_async_db
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/login", auto_error=False)
 
 @router.post("/signup", response_model=UserPublic, status_code=201)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == user.email).first()
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = (await db.execute(select(User.id).where(User.email == user.email))).first()
     if existing:
         raise HTTPException(status_code=400, detail="Email já cadastrado")
 
-    new_user = User(name=user.name, email=user.email, password_hash=hash_password(user.password))
+    # bcrypt roda no pool de processos, fora do event loop
+    new_user = User(name=user.name, email=user.email, password_hash=await password_hasher.hash(user.password))
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
 @router.post("/login", response_model=Token)
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     # OAuth2PasswordRequestForm espera fields username e password
-    user = db.query(User).filter(User.email == form.username).first()
-    if not user or not verify_password(form.password, user.password_hash):
+    user = (await db.execute(select(User).where(User.email == form.username))).scalar_one_or_none()
+    if not user or not await password_hasher.verify(form.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
+    if password_hasher.needs_rehash(user.password_hash):
+        # custo (BCRYPT_ROUNDS) aumentou desde o cadastro: aproveita a senha em claro
+        user.password_hash = await password_hasher.hash(form.password)
+        await db.commit()
     token = create_access_token(subject=str(user.id))   # verificar se token expire esta vindo por padrao
     return {"access_token": token, "token_type": "bearer"}
 
 
-def get_current_user( token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def user_id_from_token(token: str) -> int | None:
     settings = get_settings()
-    cred_exc = HTTPException(status_code=401, detail="Token inválido ou expirado")
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str | None = payload.get("sub")
-        if user_id is None:
-            raise cred_exc
-    except JWTError:
+        return int(user_id) if user_id is not None else None
+    except (JWTError, ValueError):
+        return None
+
+
+def get_current_user( token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    cred_exc = HTTPException(status_code=401, detail="Token inválido ou expirado")
+    user_id = user_id_from_token(token)
+    if user_id is None:
         raise cred_exc
-    user = db.get(User, int(user_id))
+    user = db.get(User, user_id)
     if not user:
         raise cred_exc
     return user
 
 
+def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    # como get_current_user, mas servido do cache por worker: sem round-trip ao banco
+    # para quem só precisa de current_user.id (a Session só conecta num cache miss)
+    cred_exc = HTTPException(status_code=401, detail="Token inválido ou expirado")
+    user_id = user_id_from_token(token)
+    if user_id is None:
+        raise cred_exc
+    principal = load_principal(db, user_id)
+    if principal is None:
+        raise cred_exc
+    return principal
+
+
+def get_optional_principal(token: str | None = Depends(oauth2_scheme_optional), db: Session = Depends(get_db)) -> Principal | None:
+    # para rotas públicas que personalizam a resposta quando há login; token inválido = anônimo
+    if not token:
+        return None
+    user_id = user_id_from_token(token)
+    if user_id is None:
+        return None
+    return load_principal(db, user_id)
+
+
 @router.get("/me", response_model=UserPublic)
-def me(current_user: User = Depends(get_current_user)):
+def me(current_user: Principal = Depends(get_current_principal)):
     return current_user
\ No newline at end of file
@@ -1,77 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-import httpx
-from app.db.database import SessionLocal
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.book import Book
-from app.schemas.book import BookPublic
-from app.dependencies import get_db
+from app.schemas.book import BookPublic, BookStats
+from app.dependencies import get_async_db
+from app.services.openlibrary import UpstreamUnavailable, openlibrary
+from app.services.books import books_upsert_stmt, get_search_cache, normalize_query, parse_search_docs
+from app.services.book_refresh import refresh_if_stale
+from app.services.search import index_books, search_local
+from app.core.config import get_settings
+from app.core.http_cache import conditional, make_etag
+from app.services.entity_cache import cached_book, drop_books
 
 router = APIRouter(prefix="/books", tags=["books"])
 
-OPENLIBRARY_SEARCH = "https://openlibrary.org/search.json"
-OPENLIBRARY_WORK = "https://openlibrary.org/works/{olid}.json"
-OPENLIBRARY_COVER = "https://covers.openlibrary.org/b/id/{cover_id}-L.jpg"
+SEARCH_LIMIT = 12
 
 @router.get("/search", response_model=list[BookPublic])
-async def search_books(q: str = Query(..., min_length=2), db: Session = Depends(get_db)):
-    # Busca na OpenLibrary (simplificada). Vamos retornar e também preparar cache básico.
-    async with httpx.AsyncClient(timeout=15) as client:
-        r = await client.get(OPENLIBRARY_SEARCH, params={"q": q, "limit": 12})
-        r.raise_for_status()
-        data = r.json()
+async def search_books(q: str = Query(..., min_length=2), db: AsyncSession = Depends(get_async_db)):
+    # Busca local primeiro (livros que já temos, ranqueados por reviews); a
+    # OpenLibrary só é chamada quando há poucos resultados locais.
+    key = normalize_query(q)
+    local = await search_local(db, key, SEARCH_LIMIT)
+    results = [BookPublic.model_validate(bk) for bk in local]
+    if len(results) >= get_settings().LOCAL_SEARCH_MIN_RESULTS:
+        return results
 
-    results: list[BookPublic] = []
-    for doc in data.get("docs", [])[:12]:
-        work_key = doc.get("key")  # ex: "/works/OL82563W"
-        if not work_key or not work_key.startswith("/works/"):
-            continue
-        olid = work_key.split("/")[-1]
-        title = doc.get("title") or "Sem título"
-        authors = "; ".join(doc.get("author_name", [])[:3]) if doc.get("author_name") else None
-        cover_url = None
-        if doc.get("cover_i"):
-            cover_url = OPENLIBRARY_COVER.format(cover_id=doc["cover_i"])
+    # remoto com cache por query normalizada; queries iguais e concorrentes
+    # compartilham uma única chamada upstream
+    async def load():
+        data = await openlibrary.search(key, limit=SEARCH_LIMIT)
+        return parse_search_docs(data, limit=SEARCH_LIMIT)
 
-        # upsert simples no cache
-        bk = db.get(Book, olid)
-        if not bk:
-            bk = Book(id=olid, title=title, author=authors, cover_url=cover_url)
-            db.add(bk)
-        else:
-            bk.title = title
-            bk.author = authors
-            bk.cover_url = cover_url
-        results.append(BookPublic.model_validate(bk))
+    try:
+        docs, loaded = await get_search_cache().get_or_load(key, load)
+    except UpstreamUnavailable:
+        # OpenLibrary fora: o que temos localmente é melhor que um 503
+        if results:
+            return results
+        raise
 
-    db.commit()
-    return results
+    if loaded and docs:
+        # upsert em lote no cache de livros (só quem buscou upstream escreve)
+        await db.execute(books_upsert_stmt(db.get_bind().dialect.name, docs))
+        await db.commit()
+        index_books(docs)
+        await drop_books(*(doc["id"] for doc in docs))
 
-@router.get("/{olid}", response_model=BookPublic)
-async def get_book(olid: str, db: Session = Depends(get_db)):
-    # tenta cache local primeiro
-    bk = db.get(Book, olid)
-    if bk:
-        return bk
+    seen = {bk.id for bk in results}
+    results += [BookPublic(**doc) for doc in docs if doc["id"] not in seen]
+    return results[:SEARCH_LIMIT]
 
-    # busca details do work
-    async with httpx.AsyncClient(timeout=15) as client:
-        r = await client.get(OPENLIBRARY_WORK.format(olid=olid))
-        if r.status_code == 404:
-            raise HTTPException(404, "Livro não encontrado na OpenLibrary")
-        r.raise_for_status()
-        data = r.json()
+@router.get("/{olid}/stats", response_model=BookStats)
+async def get_book_stats(olid: str, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    # só o cache local: livro sem reviews aqui não tem o que agregar
+    bk = await db.get(Book, olid)
+    if bk is None:
+        raise HTTPException(404, "Livro não encontrado")
+    # os agregados entram no ETag: updated_at sozinho não separa duas notas
+    # dentro da resolução do timestamp
+    etag = make_etag("book-stats", bk.id, bk.updated_at, bk.review_count, bk.rating_sum, *bk.rating_histogram.values())
+    not_modified = conditional(request, response, etag, bk.updated_at)
+    if not_modified:
+        return not_modified
+    return BookStats(
+        book_id=bk.id,
+        review_count=bk.review_count,
+        rating_avg=bk.rating_avg,
+        histogram=bk.rating_histogram,
+    )
 
-    title = data.get("title") or "Sem título"
-    authors = None
-    if "authors" in data:
-        names = []
-        for a in data["authors"]:
-            # a pode ter {"author": {"key": "/authors/OL...A"}}
-            # sem mais uma chamada, não temos nomes; então ficamos no cache básico
-            pass
-        # como fallback, mantenha None; nomes já vêm melhor pelo endpoint /search.
-    bk = Book(id=olid, title=title, author=authors, cover_url=None)
-    db.add(bk)
-    db.commit()
-    db.refresh(bk)
+@router.get("/{olid}", response_model=BookPublic)
+async def get_book(olid: str, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    # payload do cache compartilhado; invalidado por quem altera o livro
+    bk = await cached_book(db, olid)
+    if bk is None:
+        raise HTTPException(404, "Livro não encontrado na OpenLibrary")
+    refresh_if_stale(bk["id"], bk.get("fetched_at"))
+    updated_at = datetime.fromisoformat(bk["updated_at"]) if bk["updated_at"] else None
+    etag = make_etag("book", bk["id"], updated_at, bk["review_count"], bk["rating_avg"])
+    not_modified = conditional(request, response, etag, updated_at)
+    if not_modified:
+        return not_modified
     return bk
@@ -1,62 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import select
 from app.db.database import SessionLocal
 from app.models.comment import Comment
 from app.models.review import Review
-from app.models.user import User
 from app.schemas.comment import CommentCreate, CommentPublic, CommentUser
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_principal
 from app.dependencies import get_db
+from app.services.counters import bump_stmt
+from app.services.queries import COMMENT_ORDER, comments_page
+from app.core.pagination import finish_page
+from app.core.responses import json_rows
 
 router = APIRouter(prefix="/comments", tags=["comments"])
 
 @router.post("/review/{review_id}", response_model=CommentPublic, status_code=201)
-def create_comment(review_id: int, payload: CommentCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def create_comment(review_id: int, payload: CommentCreate, db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
     rev = db.get(Review, review_id)
     if not rev:
         raise HTTPException(404, "Review não encontrada")
 
     c = Comment(review_id=review_id, user_id=current_user.id, content=payload.content)
     db.add(c)
+    db.execute(bump_stmt(Review, review_id, comment_count=1))
     db.commit()
     db.refresh(c)
     return c
 
 @router.get("/review/{review_id}", response_model=list[CommentUser])
-def list_comments(review_id: int, db: Session=Depends(get_db), limit: int = Query(10, ge=1, le=100), offset: int = Query(0, ge=0),):
+def list_comments(review_id: int, response: Response, db: Session=Depends(get_db), limit: int = Query(10, ge=1, le=100), offset: int = Query(0, ge=0), cursor: str | None = Query(None),):
     if not db.get(Review, review_id):
         raise HTTPException(404, "Review not found")
     
-    stmt = (
-        select(
-            Comment.id,
-            Comment.content,
-            Comment.user_id,
-            User.name.label("user_name"),
-            Comment.created_at,
-        )
-        .join(User, User.id == Comment.user_id)
-        .where(Comment.review_id == review_id)
-        .order_by(Comment.id.asc())
-        .limit(limit)
-        .offset(offset)
-    )
-    rows = db.execute(stmt).all()
-    # converter row tuples -> dicts compatíveis com CommentWithUser
-    return [
-        {
-            "id": row.id,
-            "content": row.content,
-            "user_id": row.user_id,
-            "user_name": row.user_name,
-            "created_at": row.created_at,
-        }
-        for row in rows
-    ]
+    stmt = comments_page(review_id, cursor, limit, offset)
+    rows = finish_page(db.execute(stmt).all(), COMMENT_ORDER, limit, response)
+    # as colunas já vêm tipadas do banco: dicts direto para o orjson, sem
+    # passar pelo response_model (que fica só para o OpenAPI)
+    return json_rows([row._asdict() for row in rows], response)
 
 @router.delete("/{comment_id}", status_code=204)
-def delete_comment(comment_id: int, db: Session=Depends(get_db), current_user=Depends(get_current_user)):
+def delete_comment(comment_id: int, db: Session=Depends(get_db), current_user=Depends(get_current_principal)):
     comment = db.get(Comment, comment_id)
     if not comment:
         raise HTTPException(404, "Comment not found")
@@ -64,5 +46,6 @@ def delete_comment(comment_id: int, db: Session=Depends(get_db), current_user=De
         raise HTTPException(403, "You cannot delete this comment")
     
     db.delete(comment)
+    db.execute(bump_stmt(Review, comment.review_id, comment_count=-1))
     db.commit()
     return
\ No newline at end of file
@@ -0,0 +1,29 @@
+from typing import Literal
+import httpx
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from app.services.covers import InvalidCover, cover_store
+from app.services.openlibrary import UpstreamUnavailable
+
+router = APIRouter(prefix="/covers", tags=["covers"])
+
+# o conteúdo de uma (capa, tamanho) nunca muda: cache de um ano no cliente/CDN
+COVER_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@router.get("/{cover_id}", responses={200: {"content": {"image/jpeg": {}}}})
+async def get_cover(cover_id: int, request: Request, size: Literal["S", "M", "L"] = Query("M")):
+    try:
+        cover = await cover_store.get(cover_id, size)
+    except UpstreamUnavailable:
+        raise  # 503 (handler em app/main.py)
+    except httpx.HTTPError:
+        raise HTTPException(502, "Falha ao buscar a capa na OpenLibrary")
+    except InvalidCover:
+        raise HTTPException(502, "A OpenLibrary devolveu uma capa inválida")
+    if cover is None:
+        raise HTTPException(404, "Capa não encontrada")
+
+    digest, data = cover
+    headers = {"ETag": f'"{digest}"', "Cache-Control": COVER_CACHE_CONTROL}
+    if headers["ETag"] in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(data, media_type="image/jpeg", headers=headers)
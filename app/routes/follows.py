@@ -1,20 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from app.routes.auth import get_current_user
-from app.dependencies import get_db
+from app.routes.auth import get_current_principal
+from app.dependencies import get_db, id_batch
+from app.core.pagination import finish_page
+from app.core.responses import json_rows
 from app.models.user import User
 from app.models.follow import Follow
-from app.models.review import Review
 from app.schemas.user import UserPublic
 from app.schemas.review import ReviewPublic
+from app.services.counters import bump_stmt
+from app.services.entity_cache import invalidate_users
+from app.services.queries import (
+    TIMELINE_ORDER,
+    author_reviews_page,
+    followed_ids_stmt,
+    followers_stmt,
+    following_stmt,
+    timeline_page,
+)
+from app.services.review_expand import expand_reviews, parse_expand
+from app.services.timeline import (
+    backfill_author_stmt,
+    backfill_followers_stmt,
+    follower_count_stmt,
+    high_fanout_followees,
+    is_high_fanout,
+    purge_author_stmt,
+    remove_author_stmt,
+)
 
 
 router = APIRouter(prefix="/follows", tags=["follows"])
 
 @router.post("/{user_id}", status_code=201)
-def follow_user(user_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def follow_user(user_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
     if user_id == current_user.id:
         raise HTTPException(status_code=400, detail= "User cannot follow itself")
 
@@ -26,56 +47,96 @@ def follow_user(user_id: int, db: Session = Depends(get_db), current_user=Depend
         return {"following": True}
     db.add(Follow(follower_id=current_user.id, following_id=user_id))
     try:
-        db.commit()
+        db.flush()
     except IntegrityError:
         db.rollback()
         # tratar o integrity error do unique constraint no model
         return {"following": True}
+
+    db.execute(bump_stmt(User, current_user.id, following_count=1))
+    db.execute(bump_stmt(User, user_id, follower_count=1))
+
+    # traz os reviews recentes do autor para a timeline (autores grandes entram na leitura)
+    followers = db.execute(follower_count_stmt(user_id)).scalar_one()
+    if not is_high_fanout(followers):
+        db.execute(backfill_author_stmt(db.get_bind().dialect.name, current_user.id, user_id))
+    elif not is_high_fanout(followers - 1):
+        # este follow fez o autor passar do limite: as cópias antigas saem das
+        # timelines, senão o feed as mostraria duas vezes (timeline + leitura)
+        db.execute(purge_author_stmt(user_id))
+    db.commit()
+    invalidate_users(current_user.id, user_id)
     return {"following": True}
 
 
 @router.delete("/{user_id}", status_code=204)
-def unfollow_user(user_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    follow = db.query(Follow).filter(Follow.follower_id==current_user.id, Follow.following_id==user_id).first()
-    if not follow:
+def unfollow_user(user_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
+    # DELETE ... RETURNING: só quem removeu a linha mexe nos contadores
+    # (dois unfollows concorrentes não descontam duas vezes)
+    removed = db.execute(
+        delete(Follow)
+        .where(Follow.follower_id == current_user.id, Follow.following_id == user_id)
+        .returning(Follow.id)
+    ).first()
+    if removed is None:
         return
-    db.delete(follow)
+    db.execute(bump_stmt(User, current_user.id, following_count=-1))
+    db.execute(bump_stmt(User, user_id, follower_count=-1))
+    db.execute(remove_author_stmt(current_user.id, user_id))
+    followers = db.execute(follower_count_stmt(user_id)).scalar_one()
+    if is_high_fanout(followers + 1) and not is_high_fanout(followers):
+        # voltou para baixo do limite: reviews escritos sem fan-out voltam às timelines
+        db.execute(backfill_followers_stmt(db.get_bind().dialect.name, user_id))
     db.commit()
+    invalidate_users(current_user.id, user_id)
     return
 
 @router.get("/me/following", response_model=list[UserPublic])
-def list_following(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    users = db.execute(
-        select(User).join(Follow, Follow.following_id==User.id).where(Follow.follower_id==current_user.id)
-    ).scalars().all()
+def list_following(db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
+    users = db.execute(following_stmt(current_user.id)).scalars().all()
     return users
 
 @router.get("/me/followers", response_model=list[UserPublic])
-def list_followers(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    users = db.execute(
-        select(User).join(Follow, Follow.follower_id==User.id).where(Follow.following_id==current_user.id)
-    ).scalars().all()
+def list_followers(db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
+    users = db.execute(followers_stmt(current_user.id)).scalars().all()
     return users
 
 @router.get("/me/feed", response_model=list[ReviewPublic])
-def following_feed(current_user=Depends(get_current_user), 
+def following_feed(response: Response,
+                   current_user=Depends(get_current_principal), 
                    db:Session=Depends(get_db), 
                    limit: int = Query(20, ge=1, le=100), 
-                   offset: int = Query(0, ge=0),):
+                   offset: int = Query(0, ge=0),
+                   cursor: str | None = Query(None),
+                   expand: set[str] = Depends(parse_expand),):
     
-    qs = (
-        db.query(Review)
-        .options(joinedload(Review.book))
-        .join(Follow, Follow.following_id == Review.user_id)
-        .filter(Follow.follower_id == current_user.id)
-        .order_by(Review.created_at.desc())
-        .limit(limit)
-        .offset(offset)
-        .all()
-    )
-    return qs
+    order = TIMELINE_ORDER
+    celebs = high_fanout_followees(db, current_user.id)
+    # com fan-out-on-read misturado, o offset é aplicado depois do merge
+    window = limit + offset if celebs and not cursor else limit
+    page_offset = 0 if celebs else offset
+
+    # autores acima do limite vêm só da query abaixo, mesmo que ainda tenham
+    # cópias na timeline (de antes de cruzarem o limite)
+    qs = db.execute(timeline_page(current_user.id, celebs, cursor, window, page_offset)).scalars().all()
+
+    if celebs:
+        # autores com muitos seguidores não fazem fan-out: busca direto em reviews
+        qs += db.execute(author_reviews_page(celebs, cursor, window)).scalars().all()
+        qs = list({r.id: r for r in qs}.values())
+        qs.sort(key=lambda r: (r.created_at, r.id), reverse=True)
+        if not cursor:
+            qs = qs[offset:]
+
+    qs = finish_page(qs, order, limit, response, key=lambda r: (r.created_at, r.id))
+    return expand_reviews(db, qs, expand, current_user.id)
+
+@router.get("/me/status")
+def follow_status_batch(ids: list[int] = Depends(id_batch), db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
+    following = set(db.execute(followed_ids_stmt(current_user.id, ids)).scalars())
+    return json_rows([{"user_id": i, "following": i in following} for i in ids])
 
 @router.get("/me/status/{user_id}")
-def follow_status(user_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def follow_status(user_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
     exists = db.query(Follow).filter(Follow.follower_id==current_user.id, Follow.following_id==user_id).first()
     return {"following": bool(exists)}
\ No newline at end of file
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends
+from app.dependencies import require_internal
+from app.db.database import engine, async_engine
+from app.db.pool import pool_status
+from app.core.cache import get_cache
+from app.core.principal import get_principal_cache
+from app.core.security import password_hasher
+from app.services.books import get_search_cache
+from app.services.search import book_index
+from app.services.covers import cover_store
+from app.services.openlibrary import openlibrary
+from app.services.book_refresh import book_refresher
+from app.services.likes import like_buffer
+
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(require_internal)])
+
+@router.get("/cache/shared")
+def shared_cache_stats():
+    return get_cache().stats()
+
+@router.get("/cache/search")
+def search_cache_stats():
+    return get_search_cache().stats()
+
+@router.get("/search/index")
+def search_index_stats():
+    # vazio no Postgres (a busca local usa pg_trgm)
+    return book_index.stats()
+
+@router.get("/cache/covers")
+def cover_cache_stats():
+    return cover_store.stats()
+
+@router.get("/openlibrary")
+def openlibrary_stats():
+    return openlibrary.stats()
+
+@router.get("/books/refresh")
+def book_refresh_stats():
+    return book_refresher.stats()
+
+@router.get("/likes/buffer")
+def like_buffer_stats():
+    return like_buffer.stats()
+
+@router.get("/cache/principals")
+def principal_cache_stats():
+    return get_principal_cache().stats()
+
+@router.get("/password-hasher")
+def password_hasher_stats():
+    return password_hasher.stats()
+
+@router.get("/db/pool")
+def db_pool_stats():
+    return {
+        "sync": pool_status(engine.pool),
+        "async": pool_status(async_engine.pool),
+    }
@@ -1,45 +1,105 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from app.db.database import SessionLocal
 from app.models.review import Review
 from app.models.review_like import ReviewLike
-from app.routes.auth import get_current_user
-from app.dependencies import get_db
+from app.routes.auth import get_current_principal
+from app.dependencies import get_db, id_batch
+from app.services.counters import bump_stmt
+from app.services.likes import like_buffer, like_stmt, unlike_stmt
+from app.services.queries import like_counts_stmt, liked_review_ids_stmt
+from app.core.responses import json_rows
 
 router = APIRouter(prefix="/reviews", tags=["review-likes"])
 
-@router.post("/{review_id}/like", status_code=200)
-def like_review(review_id: int, db: Session=Depends(get_db), current_user=Depends(get_current_user)):
-    rev = db.get(Review, review_id)
-    if not rev:
-     raise HTTPException(404, "Review não encontrada")
-    
-    existing = (
-        db.query(ReviewLike)
-        .filter(ReviewLike.review_id == review_id, ReviewLike.user_id == current_user.id)
-        .first()
-    )
+def _review_exists(db: Session, review_id: int) -> bool:
+    return db.execute(select(Review.id).where(Review.id == review_id)).first() is not None
+
 
-    if existing:    # toggle
-        db.delete(existing)
+def _apply_like(db: Session, review_id: int, user_id: int, liked: bool) -> bool:
+    # um statement condicional; o contador só anda se o banco mudou algo.
+    # Retorna se mudou (False: já estava assim ou o review não existe).
+    if liked:
+        changed = db.execute(like_stmt(db.get_bind().dialect.name, review_id, user_id)).first() is not None
+    else:
+        changed = db.execute(unlike_stmt(review_id, user_id)).first() is not None
+    if changed:
+        db.execute(bump_stmt(Review, review_id, like_count=1 if liked else -1))
         db.commit()
+    return changed
+
+
+def _set_like(db: Session, review_id: int, user_id: int, liked: bool):
+    # idempotente: o estado final é `liked` independente do anterior
+    if like_buffer.enabled:
+        if not _review_exists(db, review_id):
+            raise HTTPException(404, "Review não encontrada")
+        like_buffer.add(review_id, user_id, liked)
+        return
+    if not _apply_like(db, review_id, user_id, liked) and not _review_exists(db, review_id):
+        raise HTTPException(404, "Review não encontrada")
+
+
+@router.put("/{review_id}/like", status_code=200)
+def put_like(review_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
+    _set_like(db, review_id, current_user.id, True)
+    return {"liked": True}
+
+
+@router.delete("/{review_id}/like", status_code=204)
+def delete_like(review_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
+    _set_like(db, review_id, current_user.id, False)
+    return
+
+
+@router.post("/{review_id}/like", status_code=200)
+def like_review(review_id: int, db: Session=Depends(get_db), current_user=Depends(get_current_principal)):
+    # toggle; prefira PUT/DELETE, que são idempotentes (retries, cliques duplos)
+    if like_buffer.enabled:
+        liked = like_buffer.pending(review_id, current_user.id)
+        if liked is None:
+            liked = db.execute(
+                select(ReviewLike.id).where(ReviewLike.review_id == review_id, ReviewLike.user_id == current_user.id)
+            ).first() is not None
+        _set_like(db, review_id, current_user.id, not liked)
+        return {"liked": not liked}
+
+    # remove se existir; senão insere. Um clique concorrente que inseriu
+    # antes faz o INSERT não mudar nada: o estado final é "curtido" do mesmo jeito
+    if _apply_like(db, review_id, current_user.id, False):
         return {"liked": False}
-    
-    like = ReviewLike(review_id=review_id, user_id=current_user.id)
-    db.add(like)
-    db.commit()
+    if not _apply_like(db, review_id, current_user.id, True) and not _review_exists(db, review_id):
+        raise HTTPException(404, "Review não encontrada")
     return {"liked": True}
 
 
+@router.get("/likes/count")
+def count_likes_batch(ids: list[int] = Depends(id_batch), db: Session = Depends(get_db)):
+    counts = dict(db.execute(like_counts_stmt(ids)).all())
+    return json_rows([{"review_id": i, "likes": counts.get(i, 0)} for i in ids])
+
+
+@router.get("/likes/me")
+def liked_by_me_batch(ids: list[int] = Depends(id_batch), db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
+    liked = set(db.execute(liked_review_ids_stmt(current_user.id, ids)).scalars())
+    # likes ainda no buffer de write-behind deste worker
+    for review_id, state in like_buffer.pending_for_user(current_user.id, ids).items():
+        (liked.add if state else liked.discard)(review_id)
+    return json_rows([{"review_id": i, "liked": i in liked} for i in ids])
+
+
 @router.get("/{review_id}/likes/count")
 def count_likes(review_id: int, db: Session = Depends(get_db)):
-    count = db.query(func.count(ReviewLike.id)).filter(ReviewLike.review_id == review_id).scalar()
+    count = db.query(Review.like_count).filter(Review.id == review_id).scalar()
     return {"review_id": review_id, "likes": count or 0}
 
 
 @router.get("/{review_id}/likes/me")
-def liked_by_me(review_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def liked_by_me(review_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_principal)):
+    pending = like_buffer.pending(review_id, current_user.id)
+    if pending is not None:
+        return {"liked": pending}
 
     liked = (
          db.query(ReviewLike)
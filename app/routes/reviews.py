@@ -1,60 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from app.db.database import SessionLocal
 from app.models.book import Book
 from app.models.review import Review
+from app.models.user import User
 from app.schemas.review import ReviewCreate, ReviewPublic, ReviewEdit
-from app.routes.auth import get_current_user 
-from app.dependencies import get_db
-import httpx
+from app.routes.auth import get_current_principal, get_optional_principal
+from app.core.http_cache import conditional, has_validator, make_etag
+from app.core.pagination import finish_page
+from app.dependencies import get_db, get_async_db
+from app.services.books import fetch_book
+from app.services.book_refresh import refresh_if_stale
+from app.services.counters import bump_stmt, rating_deltas
+from app.services.entity_cache import drop_books, drop_users, invalidate_books, invalidate_users
+from app.services.queries import BOOK_REVIEW_ORDER, REVIEW_ORDER, by_book, review_version_key, review_version_stmt, reviews_page
+from app.services.review_expand import expand_reviews, loaded_page_etag, page_etag, parse_expand
+from app.services.timeline import fanout_review_stmt, follower_count_stmt, is_high_fanout, remove_review_stmt
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
-OPENLIBRARY_WORK = "https://openlibrary.org/works/{olid}.json"
-OPENLIBRARY_COVER = "https://covers.openlibrary.org/b/id/{cover_id}-L.jpg"
 
-
-async def ensure_book_cached(db: Session, olid: str):
-    bk = db.get(Book, olid)
-    if bk:
-        return bk
-
-    async with httpx.AsyncClient(timeout=15) as client:
-        r = await client.get(OPENLIBRARY_WORK.format(olid=olid))
-        if r.status_code == 404:
-            raise HTTPException(status_code=400, detail="Book not found on OpenLibrary")
-        r.raise_for_status()
-        data = r.json()
-
-    title = data.get("title") or "Untitled"
-    # authors list in /works requires extra calls to resolve names; we keep None here.
-    cover_url = None
-    covers = data.get("covers")
-    if isinstance(covers, list) and len(covers) > 0:
-        cover_url = OPENLIBRARY_COVER.format(cover_id=covers[0])
-
-    bk = Book(id=olid, title=title, authors=None, cover_url=cover_url)
-    db.add(bk)
-    db.commit()
-    db.refresh(bk)
+async def ensure_book_cached(db: AsyncSession, olid: str):
+    bk = await fetch_book(db, olid)
+    if bk is None:
+        raise HTTPException(status_code=400, detail="Book not found on OpenLibrary")
+    refresh_if_stale(bk.id, bk.fetched_at)
     return bk
 
 
 @router.post("", response_model=ReviewPublic, status_code=201)
 async def create_review(
     payload: ReviewCreate,
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_principal),
 ):
-    book = db.get(Book, payload.book_id)
-    if not book:
-        book = await ensure_book_cached(db, payload.book_id)
+    book = await ensure_book_cached(db, payload.book_id)
 
     existing = (
-    db.query(Review)
-    .filter(Review.user_id == current_user.id, Review.book_id == book.id)
-    .first()
-)
+        await db.execute(
+            select(Review.id).where(Review.user_id == current_user.id, Review.book_id == book.id)
+        )
+    ).first()
     if existing:
         raise HTTPException(status_code=400, detail="You have already reviewed this book")
 
@@ -66,73 +55,123 @@ async def create_review(
     )
 
     db.add(review)
-    db.commit()
-    db.refresh(review)
-
-    db.refresh(book)    # eager attach for response
-    review.book = book
+    await db.flush()
+    await db.execute(bump_stmt(User, current_user.id, review_count=1))
+    await db.execute(bump_stmt(Book, book.id, **rating_deltas(payload.rating)))
+
+    # fan-out para as timelines dos seguidores, na mesma transação
+    followers = (await db.execute(follower_count_stmt(current_user.id))).scalar_one()
+    if not is_high_fanout(followers):
+        await db.execute(fanout_review_stmt(review.id))
+
+    await db.commit()
+    await drop_books(book.id)
+    await drop_users(current_user.id)
+    await db.refresh(review)
+    await db.refresh(book)    # agregados de nota atualizados
+
+    set_committed_value(review, "book", book)    # attach for response, sem lazy load
     return review
 
 
 @router.put("/{review_id}", response_model=ReviewPublic)
-def edit_review(review_id: int, payload: ReviewEdit, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def edit_review(review_id: int, payload: ReviewEdit, db: Session = Depends(get_db), current_user = Depends(get_current_principal)):
     rev = db.query(Review).options(joinedload(Review.book)).filter(Review.id == review_id).first()
     if not rev:
         raise HTTPException(status_code=400, detail="Review not found")
     if rev.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
     
+    rating_changed = payload.rating is not None and payload.rating != rev.rating
+    if rating_changed:
+        # move a nota no histograma do livro
+        deltas = rating_deltas(rev.rating, -1)
+        for key, delta in rating_deltas(payload.rating).items():
+            deltas[key] = deltas.get(key, 0) + delta
+        db.execute(bump_stmt(Book, rev.book_id, **deltas))
+
     rev.content = payload.content if payload.content is not None else rev.content
     rev.rating = payload.rating if payload.rating is not None else rev.rating
 
     db.commit()
     db.refresh(rev)
+    if rating_changed:
+        invalidate_books(rev.book_id)
     return rev
 
 
 @router.delete("/{review_id}", status_code=204)
-def delete_review(review_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def delete_review(review_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_principal)):
     rev = db.get(Review, review_id)
     if not rev:
         raise HTTPException(status_code=400, detail="Review not found")
     if rev.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
     
+    db.execute(remove_review_stmt(rev.id))
+    db.execute(bump_stmt(User, rev.user_id, review_count=-1))
+    db.execute(bump_stmt(Book, rev.book_id, **rating_deltas(rev.rating, -1)))
+    book_id, user_id = rev.book_id, rev.user_id
     db.delete(rev)
     db.commit()
+    invalidate_books(book_id)
+    invalidate_users(user_id)
 
     return
 
 @router.get("/book/{olid}", response_model=list[ReviewPublic])
-def list_reviews_by_book(olid: str, db: Session = Depends(get_db), limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0)):
-    qs = (
-        db.query(Review)
-        .options(joinedload(Review.book))
-        .filter(Review.book_id == olid)
-        .order_by(Review.id.desc())
-        .limit(limit)
-        .offset(offset)
-        .all()
-    )
-    return qs
+def list_reviews_by_book(olid: str, request: Request, response: Response, db: Session = Depends(get_db), limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0), cursor: str | None = Query(None),
+                         expand: set[str] = Depends(parse_expand), viewer = Depends(get_optional_principal)):
+    order = BOOK_REVIEW_ORDER
+    criteria = by_book(olid)
+    viewer_id = viewer.id if viewer else None
+    private = "viewer" in expand and viewer is not None
+    if has_validator(request):
+        etag = page_etag(db, criteria, order, cursor, limit, offset, expand, viewer_id)
+        not_modified = conditional(request, response, etag, private=private, vary_auth="viewer" in expand)
+        if not_modified:
+            return not_modified
+
+    qs = db.execute(reviews_page(criteria, order, cursor, limit, offset)).scalars().all()
+    conditional(request, response, loaded_page_etag(qs, expand, viewer_id), private=private, vary_auth="viewer" in expand)
+    qs = finish_page(qs, order, limit, response)
+    return expand_reviews(db, qs, expand, viewer_id)
 
 
 @router.get("/feed", response_model=list[ReviewPublic])
-def recent_reviews(db: Session = Depends(get_db), limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0)):
-    qs = (
-        db.query(Review)
-        .options(joinedload(Review.book))
-        .order_by(Review.created_at.desc())
-        .limit(limit)
-        .offset(offset)
-        .all()
-    )
-    return qs
+def recent_reviews(request: Request, response: Response, db: Session = Depends(get_db), limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0), cursor: str | None = Query(None),
+                   expand: set[str] = Depends(parse_expand), viewer = Depends(get_optional_principal)):
+    order = REVIEW_ORDER
+    viewer_id = viewer.id if viewer else None
+    private = "viewer" in expand and viewer is not None
+    if has_validator(request):
+        etag = page_etag(db, (), order, cursor, limit, offset, expand, viewer_id)
+        not_modified = conditional(request, response, etag, private=private, vary_auth="viewer" in expand)
+        if not_modified:
+            return not_modified
+
+    qs = db.execute(reviews_page((), order, cursor, limit, offset)).scalars().all()
+    conditional(request, response, loaded_page_etag(qs, expand, viewer_id), private=private, vary_auth="viewer" in expand)
+    qs = finish_page(qs, order, limit, response)
+    return expand_reviews(db, qs, expand, viewer_id)
 
 
 @router.get("/{review_id}", response_model=ReviewPublic)
-def get_review_detail(review_id: int, db: Session = Depends(get_db)):
-    
+def get_review_detail(review_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    def versioned(version) -> Response | None:
+        # version: tupla de REVIEW_VERSION; Last-Modified = o mais novo entre review e livro
+        last_modified = max((v for v in (version[1], version[5]) if v is not None), default=None)
+        return conditional(request, response, make_etag("review", *version), last_modified)
+
+    if has_validator(request):
+        # versão numa query pela PK, antes de carregar tudo
+        version = db.execute(review_version_stmt(review_id)).first()
+        if not version:
+            raise HTTPException(404, "Review not found")
+        not_modified = versioned(tuple(version))
+        if not_modified:
+            return not_modified
+
     review = (
         db.query(Review)
         .options(joinedload(Review.book))
@@ -141,4 +180,5 @@ def get_review_detail(review_id: int, db: Session = Depends(get_db)):
     )
     if not review:
         raise HTTPException(404, "Review not found")
+    versioned(review_version_key(review))
     return review
\ No newline at end of file
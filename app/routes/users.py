@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_principal, get_optional_principal
 from app.models.user import User
-from app.models.review import Review
-from app.models.follow import Follow
 from app.schemas.review import ReviewPublic
-from app.dependencies import get_db
+from app.dependencies import get_db, get_async_db
+from app.core.http_cache import conditional, has_validator, make_etag
+from app.core.pagination import finish_page
+from app.services.entity_cache import cached_user
+from app.services.queries import REVIEW_ORDER, by_user, reviews_page
+from app.services.review_expand import expand_reviews, loaded_page_etag, page_etag, parse_expand
 from app.schemas.user import UserPublic
 
 
@@ -15,63 +19,71 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/me/reviews", response_model=list[ReviewPublic])
 def my_reviews(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_current_principal),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
+    expand: set[str] = Depends(parse_expand),
 ):
-    qs = (
-        db.query(Review)
-        .options(joinedload(Review.book))
-        .filter(Review.user_id == current_user.id)
-        .order_by(Review.created_at.desc())
-        .limit(limit)
-        .offset(offset)
-        .all()
-    )
-    return qs
+    order = REVIEW_ORDER
+    criteria = by_user(current_user.id)
+    if has_validator(request):
+        etag = page_etag(db, criteria, order, cursor, limit, offset, expand, current_user.id)
+        not_modified = conditional(request, response, etag, private=True)
+        if not_modified:
+            return not_modified
+
+    qs = db.execute(reviews_page(criteria, order, cursor, limit, offset)).scalars().all()
+    conditional(request, response, loaded_page_etag(qs, expand, current_user.id), private=True)
+    qs = finish_page(qs, order, limit, response)
+    return expand_reviews(db, qs, expand, current_user.id)
 
 @router.get("/{user_id}", response_model=UserPublic)
-def get_user_public(user_id: int, db: Session=Depends(get_db)):
-    user = db.get(User, user_id)
+async def get_user_public(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    user = await cached_user(db, user_id)
     if not user:
         raise HTTPException(404, "User not found")
+    # perfil não é editável pela API: created_at versiona o recurso
+    created_at = datetime.fromisoformat(user["created_at"]) if user["created_at"] else None
+    not_modified = conditional(request, response, make_etag("user", user["id"], created_at), created_at)
+    if not_modified:
+        return not_modified
     return user
 
 @router.get("/{user_id}/reviews", response_model=list[ReviewPublic])
-def get_user_reviews(user_id: int, db:Session = Depends(get_db), limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0)):
+def get_user_reviews(user_id: int, request: Request, response: Response, db:Session = Depends(get_db), limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0), cursor: str | None = Query(None),
+                     expand: set[str] = Depends(parse_expand), viewer = Depends(get_optional_principal)):
     user = db.get(User, user_id)
     if not user:
         raise HTTPException(404, "User not found")
 
-    qs = (
-        db.query(Review)
-        .options(joinedload(Review.book))
-        .filter(Review.user_id == user_id)
-        .order_by(Review.created_at.desc())
-        .limit(limit)
-        .offset(offset)
-        .all()
-    )
+    order = REVIEW_ORDER
+    criteria = by_user(user_id)
+    viewer_id = viewer.id if viewer else None
+    private = "viewer" in expand and viewer is not None
+    if has_validator(request):
+        etag = page_etag(db, criteria, order, cursor, limit, offset, expand, viewer_id)
+        not_modified = conditional(request, response, etag, private=private, vary_auth="viewer" in expand)
+        if not_modified:
+            return not_modified
 
-    return qs
+    qs = db.execute(reviews_page(criteria, order, cursor, limit, offset)).scalars().all()
+    conditional(request, response, loaded_page_etag(qs, expand, viewer_id), private=private, vary_auth="viewer" in expand)
+    qs = finish_page(qs, order, limit, response)
+    return expand_reviews(db, qs, expand, viewer_id)
 
 @router.get("/{user_id}/counters")
-def get_user_counters(user_id: int, db: Session = Depends(get_db)):
-    user = db.get(User, user_id)
+async def get_user_counters(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    user = await cached_user(db, user_id)
     if not user:
         raise HTTPException(404, "User not found")
 
-    followers = (
-        db.query(func.count(Follow.id))
-        .filter(Follow.following_id == user_id)
-        .scalar()
-        or 0
-    )
-    reviews = (
-        db.query(func.count(Review.id))
-        .filter(Review.user_id == user_id)
-        .scalar()
-        or 0
-    )
-    return {"followers": followers, "reviews": reviews}
\ No newline at end of file
+    # contadores denormalizados, mantidos nas próprias escritas (que invalidam o cache)
+    return {
+        "followers": user["followers"],
+        "following": user["following"],
+        "reviews": user["reviews"],
+    }
\ No newline at end of file
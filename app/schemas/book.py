@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+from app.core.cover_urls import proxy_cover_url
 
 class BookBase(BaseModel):
     id: str
@@ -7,5 +8,22 @@ class BookBase(BaseModel):
     cover_url: str | None = None
 
 class BookPublic(BookBase):
+    # ausentes nos resultados de /books/search (vêm direto da OpenLibrary)
+    review_count: int | None = None
+    rating_avg: float | None = None
+
+    @field_validator("cover_url")
+    @classmethod
+    def use_cover_proxy(cls, v: str | None) -> str | None:
+        # clientes buscam capas pelo nosso /covers, nunca direto na OpenLibrary
+        return proxy_cover_url(v)
+
     class Config:
         from_attributes = True
+
+
+class BookStats(BaseModel):
+    book_id: str
+    review_count: int
+    rating_avg: float | None = None
+    histogram: dict[int, int]
@@ -13,6 +13,23 @@ class ReviewEdit(BaseModel):
     rating: Optional[int] = Field(None, ge=1, le=5)
 
 
+class ReviewAuthor(BaseModel):
+    id: int
+    name: str
+
+    class Config:
+        from_attributes = True
+
+
+class ReviewStats(BaseModel):
+    likes: int
+    comments: int
+
+
+class ReviewViewer(BaseModel):
+    liked: bool
+
+
 class ReviewPublic(BaseModel):
     id: int
     content: str
@@ -20,5 +37,10 @@ class ReviewPublic(BaseModel):
     user_id: int
     book: BookPublic
 
+    # preenchidos só com ?expand=author,stats,viewer
+    author: ReviewAuthor | None = None
+    stats: ReviewStats | None = None
+    viewer: ReviewViewer | None = None
+
     class Config:
         from_attributes = True
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.upsert import insert_for
+from app.models.author import Author
+from app.services.openlibrary import openlibrary
+
+logger = logging.getLogger(__name__)
+
+# mesmo corte de autores usado nos resultados de /books/search
+MAX_AUTHORS = 3
+
+
+def work_author_keys(data: dict) -> list[str]:
+    # {"authors": [{"author": {"key": "/authors/OL23919A"}, ...}]} -> ["OL23919A"]
+    keys = []
+    for entry in data.get("authors") or []:
+        ref = entry.get("author") if isinstance(entry, dict) else None
+        key = ref.get("key") if isinstance(ref, dict) else None
+        if key and key.startswith("/authors/"):
+            key = key.split("/")[-1]
+            if key not in keys:
+                keys.append(key)
+    return keys[:MAX_AUTHORS]
+
+
+async def _fetch_author(key: str) -> str | None:
+    # um autor que falha não derruba o livro: fica sem nome e tentamos de novo depois
+    try:
+        data = await openlibrary.get_author(key)
+    except httpx.HTTPError as exc:
+        logger.warning("falha ao resolver autor %s: %s", key, exc)
+        return None
+    if not data:
+        return None
+    return data.get("name") or data.get("personal_name")
+
+
+async def resolve_authors(db: AsyncSession, keys: list[str]) -> dict[str, str]:
+    # key -> nome. Uma query para os já conhecidos; os demais são buscados em
+    # paralelo (limitado pelo semáforo do cliente da OpenLibrary) e gravados.
+    if not keys:
+        return {}
+    rows = await db.execute(select(Author.id, Author.name).where(Author.id.in_(keys)))
+    names = dict(rows.all())
+
+    missing = [key for key in keys if key not in names]
+    if missing:
+        fetched = await asyncio.gather(*(_fetch_author(key) for key in missing))
+        new = [{"id": key, "name": name} for key, name in zip(missing, fetched) if name]
+        if new:
+            stmt = insert_for(db.get_bind().dialect.name, Author).values(new)
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[Author.id], set_={"name": stmt.excluded.name}
+            ))
+            names.update((row["id"], row["name"]) for row in new)
+    return names
+
+
+def join_author_names(keys: list[str], names: dict[str, str]) -> str | None:
+    # na ordem da work, no formato de parse_search_docs ("A; B")
+    resolved = [names[key] for key in keys if key in names]
+    return "; ".join(resolved) if resolved else None
@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+import httpx
+from sqlalchemy import and_, bindparam, case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache, get_cache
+from app.core.config import get_settings
+from app.db.database import AsyncSessionLocal, async_engine
+from app.models.book import Book
+from app.services.authors import join_author_names, resolve_authors, work_author_keys
+from app.services.books import metadata_changed, parse_work
+from app.services.entity_cache import drop_books
+from app.services.openlibrary import openlibrary
+from app.services.search import index_books
+
+logger = logging.getLogger(__name__)
+
+# stale-while-revalidate dos livros: quem lê um livro velho recebe o que
+# temos na hora e a atualização roda em background. Cada worker tenta no
+# máximo uma vez por livro a cada REFRESH_RETRY_AFTER (sucesso ou falha).
+REFRESH_RETRY_AFTER = 300.0
+_attempted = TTLCache(maxsize=10000, ttl=REFRESH_RETRY_AFTER)
+_tasks: set[asyncio.Task] = set()
+
+
+def is_stale(fetched_at: datetime | str | None) -> bool:
+    if fetched_at is None:
+        return True
+    if isinstance(fetched_at, str):
+        fetched_at = datetime.fromisoformat(fetched_at)
+    if fetched_at.tzinfo is None:
+        fetched_at = fetched_at.replace(tzinfo=timezone.utc)  # SQLite devolve naive (UTC)
+    age = datetime.now(timezone.utc) - fetched_at
+    return age > timedelta(seconds=get_settings().BOOK_FRESHNESS_SECONDS)
+
+
+async def refresh_book(db: AsyncSession, olid: str) -> bool:
+    # busca o work de novo e regrava título/autor/capa. fetched_at sempre avança,
+    # mesmo sem mudanças: marca a checagem; updated_at só se algo mudou.
+    # False se o work sumiu da OpenLibrary.
+    data = await openlibrary.get_work(olid)
+    if data is None:
+        return False
+    keys = work_author_keys(data)
+    names = await resolve_authors(db, keys)
+    fields = parse_work(olid, data, join_author_names(keys, names))
+    del fields["id"]
+    if len(names) < len(keys):
+        # algum autor não resolveu agora: não troca um nome bom por um parcial
+        del fields["author"]
+
+    changed = metadata_changed(fields["title"], fields.get("author", Book.author), fields["cover_url"])
+    await db.execute(
+        update(Book)
+        .where(Book.id == olid)
+        .values(**fields, fetched_at=func.now(), updated_at=case((changed, func.now()), else_=Book.updated_at))
+    )
+    await db.commit()
+    await drop_books(olid)
+    if "author" in fields:
+        index_books([{"id": olid, "title": fields["title"], "author": fields["author"]}])
+    return True
+
+
+async def _refresh_in_background(olid: str):
+    try:
+        async with AsyncSessionLocal() as db:
+            await refresh_book(db, olid)
+    except httpx.HTTPError as exc:
+        logger.info("atualização do livro %s adiada: %s", olid, exc)
+    except Exception:
+        logger.exception("atualização do livro %s falhou", olid)
+
+
+def refresh_if_stale(olid: str, fetched_at: datetime | str | None):
+    # com BOOK_REFRESH_ON_READ desligado (refresher em lote), as leituras ficam puramente locais
+    if not get_settings().BOOK_REFRESH_ON_READ or not is_stale(fetched_at) or _attempted.get(olid):
+        return
+    _attempted.set(olid, True)
+    task = asyncio.create_task(_refresh_in_background(olid))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+# --- refresher em lote ---
+
+def _refresh_criteria(now: datetime):
+    # velhos (fetched_at além da janela de frescor) ou incompletos (sem autor
+    # ou capa, p/ ex. criados por get_book com a OpenLibrary instável), estes
+    # com um intervalo próprio: alguns works não têm mesmo autor/capa.
+    # Livros que um lote recente já pegou ficam de fora por um tempo: uma
+    # busca que falha não prende a cabeça da fila.
+    settings = get_settings()
+    stale = now - timedelta(seconds=settings.BOOK_FRESHNESS_SECONDS)
+    incomplete = now - timedelta(seconds=settings.BOOK_REFRESH_INCOMPLETE_AFTER)
+    retry = now - timedelta(seconds=settings.BOOK_REFRESH_RETRY_AFTER)
+    return and_(
+        or_(
+            Book.fetched_at.is_(None),
+            Book.fetched_at < stale,
+            and_(Book.fetched_at < incomplete, or_(Book.author.is_(None), Book.cover_url.is_(None))),
+        ),
+        or_(Book.refresh_attempted_at.is_(None), Book.refresh_attempted_at < retry),
+    )
+
+
+def bulk_refresh_stmt():
+    # executemany (um round-trip por lote). None mantém o valor atual: work que
+    # sumiu da OpenLibrary ou autor que não resolveu agora. fetched_at sempre
+    # avança, tirando a linha do backlog; updated_at só se algo mudou.
+    title = func.coalesce(bindparam("title", type_=Book.title.type), Book.title)
+    author = func.coalesce(bindparam("author", type_=Book.author.type), Book.author)
+    cover_url = func.coalesce(bindparam("cover_url", type_=Book.cover_url.type), Book.cover_url)
+    return (
+        update(Book)
+        .where(Book.id == bindparam("b_id"))
+        .values(
+            title=title,
+            author=author,
+            cover_url=cover_url,
+            fetched_at=func.now(),
+            updated_at=case((metadata_changed(title, author, cover_url), func.now()), else_=Book.updated_at),
+        )
+    )
+
+
+class RateLimiter:
+    # espaça as chamadas: no máximo `rate` por segundo (rajadas não acumulam)
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+
+    async def wait(self):
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class BookRefresher:
+    """Atualiza em lote livros velhos/incompletos a partir da OpenLibrary.
+
+    Cada lote: seleciona até BOOK_REFRESH_BATCH ids (mais antigos primeiro),
+    busca os works em paralelo respeitando BOOK_REFRESH_RATE, resolve os
+    autores de todos de uma vez e grava com um único UPDATE executemany.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self.batches = 0
+        self.refreshed = 0
+        self.missing = 0  # works que sumiram da OpenLibrary
+        self.failed = 0
+        self.backlog: int | None = None
+        self.last_batch_at: datetime | None = None
+        self.last_error: str | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _fetch_work(self, limiter: RateLimiter, olid: str) -> dict | None | Exception:
+        await limiter.wait()
+        try:
+            return await openlibrary.get_work(olid)
+        except httpx.HTTPError as exc:
+            return exc
+
+    async def run_batch(self, db: AsyncSession) -> int:
+        # retorna quantos livros foram gravados (0: nada a fazer ou upstream fora)
+        settings = get_settings()
+        criteria = _refresh_criteria(datetime.now(timezone.utc))
+        self.backlog = (await db.execute(select(func.count()).select_from(Book).where(criteria))).scalar_one()
+        ids = (await db.execute(
+            select(Book.id).where(criteria).order_by(Book.fetched_at, Book.id).limit(settings.BOOK_REFRESH_BATCH)
+        )).scalars().all()
+        self.last_batch_at = datetime.now(timezone.utc)
+        if not ids:
+            return 0
+        # marca a tentativa antes de buscar: falhas (e works em que a busca
+        # trava) esperam BOOK_REFRESH_RETRY_AFTER em vez de voltar no próximo lote
+        await db.execute(
+            update(Book)
+            .where(Book.id.in_(ids))
+            .values(refresh_attempted_at=func.now(), updated_at=Book.updated_at)
+        )
+        await db.commit()
+
+        limiter = RateLimiter(settings.BOOK_REFRESH_RATE)
+        fetched = await asyncio.gather(*(self._fetch_work(limiter, olid) for olid in ids))
+        works = {}
+        for olid, data in zip(ids, fetched):
+            if isinstance(data, Exception):
+                self.failed += 1
+                self.last_error = f"{olid}: {data}"
+            else:
+                works[olid] = data
+
+        author_keys = {olid: work_author_keys(data) for olid, data in works.items() if data}
+        names = await resolve_authors(db, list(dict.fromkeys(k for keys in author_keys.values() for k in keys)))
+
+        rows, indexed = [], []
+        for olid, data in works.items():
+            if data is None:
+                self.missing += 1
+                rows.append({"b_id": olid, "title": None, "author": None, "cover_url": None})
+                continue
+            keys = author_keys[olid]
+            fields = parse_work(olid, data, join_author_names(keys, names))
+            if not all(key in names for key in keys):
+                fields["author"] = None  # parcial: mantém o que temos
+            rows.append({"b_id": olid, "title": fields["title"], "author": fields["author"], "cover_url": fields["cover_url"]})
+            indexed.append(olid)
+        if not rows:
+            return 0
+
+        conn = await db.connection()
+        await conn.execute(bulk_refresh_stmt(), rows)
+        await db.commit()
+        await drop_books(*works)
+        if indexed:
+            current = await db.execute(select(Book.id, Book.title, Book.author).where(Book.id.in_(indexed)))
+            index_books([row._asdict() for row in current])
+        self.batches += 1
+        self.refreshed += len(rows)
+        self.backlog = max(0, self.backlog - len(rows))
+        return len(rows)
+
+    async def run_forever(self):
+        idle = get_settings().BOOK_REFRESH_IDLE_INTERVAL
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    written = await self.run_batch(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("refresher de livros: lote falhou")
+                self.last_error = str(exc)
+                written = 0
+            # backlog vazio ou OpenLibrary fora: espera antes do próximo lote
+            if not written:
+                await asyncio.sleep(idle)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "backlog": self.backlog,
+            "batches": self.batches,
+            "refreshed": self.refreshed,
+            "missing": self.missing,
+            "failed": self.failed,
+            "last_batch_at": self.last_batch_at.isoformat() if self.last_batch_at else None,
+            "last_error": self.last_error,
+        }
+
+
+book_refresher = BookRefresher()
+
+
+async def _main(once: bool):
+    import app.db.init_db  # noqa: F401  registra todos os models
+
+    await openlibrary.start()
+    await get_cache().start()
+    try:
+        async with AsyncSessionLocal() as db:
+            while await book_refresher.run_batch(db) and not once:
+                print(book_refresher.stats())
+        print(book_refresher.stats())
+    finally:
+        await get_cache().close()
+        await openlibrary.close()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Atualiza livros velhos/incompletos a partir da OpenLibrary")
+    parser.add_argument("--once", action="store_true", help="só um lote")
+    asyncio.run(_main(parser.parse_args().once))
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from sqlalchemy import case, func, or_
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.db.upsert import insert_for
+from app.models.book import Book
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services.openlibrary import openlibrary, OPENLIBRARY_COVER
+from app.services.authors import join_author_names, resolve_authors, work_author_keys
+from app.services.search import index_books
+
+
+def normalize_query(q: str) -> str:
+    return " ".join(q.lower().split())
+
+
+@lru_cache
+def get_search_cache() -> TTLCache:
+    settings = get_settings()
+    return TTLCache(maxsize=settings.SEARCH_CACHE_SIZE, ttl=settings.SEARCH_CACHE_TTL)
+
+
+def parse_search_docs(data: dict, limit: int = 12) -> list[dict]:
+    # converte os docs do /search.json em dicts no formato de BookPublic
+    books: dict[str, dict] = {}
+    for doc in data.get("docs", [])[:limit]:
+        work_key = doc.get("key")  # ex: "/works/OL82563W"
+        if not work_key or not work_key.startswith("/works/"):
+            continue
+        olid = work_key.split("/")[-1]
+        if olid in books:
+            continue
+        cover_url = None
+        if doc.get("cover_i"):
+            cover_url = OPENLIBRARY_COVER.format(cover_id=doc["cover_i"])
+        books[olid] = {
+            "id": olid,
+            "title": doc.get("title") or "Sem título",
+            "author": "; ".join(doc.get("author_name", [])[:3]) if doc.get("author_name") else None,
+            "cover_url": cover_url,
+        }
+    return list(books.values())
+
+
+def metadata_changed(title, author, cover_url):
+    # os valores novos diferem do que está gravado?
+    return or_(
+        Book.title.is_distinct_from(title),
+        Book.author.is_distinct_from(author),
+        Book.cover_url.is_distinct_from(cover_url),
+    )
+
+
+def books_upsert_stmt(dialect_name: str, docs: list[dict]):
+    # um único INSERT ... ON CONFLICT (id) DO UPDATE para a página inteira.
+    # updated_at só anda quando algo mudou; fetched_at marca a leitura, mas
+    # linhas iguais e ainda frescas não são regravadas a cada busca
+    rows = list({doc["id"]: doc for doc in docs}.values())
+    stmt = insert_for(dialect_name, Book).values(rows)
+    excluded = stmt.excluded
+    changed = metadata_changed(excluded.title, excluded.author, excluded.cover_url)
+    half_fresh = timedelta(seconds=get_settings().BOOK_FRESHNESS_SECONDS / 2)
+    return stmt.on_conflict_do_update(
+        index_elements=[Book.id],
+        set_={
+            "title": excluded.title,
+            "author": excluded.author,
+            "cover_url": excluded.cover_url,
+            "updated_at": case((changed, func.now()), else_=Book.updated_at),
+            "fetched_at": func.now(),
+        },
+        where=or_(
+            changed,
+            Book.fetched_at.is_(None),
+            Book.fetched_at < datetime.now(timezone.utc) - half_fresh,
+        ),
+    )
+
+
+def parse_work(olid: str, data: dict, author: str | None = None) -> dict:
+    # author: nomes já resolvidos (authors em /works só trazem as keys)
+    cover_url = None
+    covers = data.get("covers")
+    if isinstance(covers, list) and len(covers) > 0:
+        cover_url = OPENLIBRARY_COVER.format(cover_id=covers[0])
+    return {
+        "id": olid,
+        "title": data.get("title") or "Sem título",
+        "author": author,
+        "cover_url": cover_url,
+    }
+
+
+async def fetch_book(db: AsyncSession, olid: str) -> Book | None:
+    # cache local primeiro; senão busca o work na OpenLibrary e grava.
+    # None quando o work não existe lá.
+    bk = await db.get(Book, olid)
+    if bk:
+        return bk
+
+    data = await openlibrary.get_work(olid)
+    if data is None:
+        return None
+
+    keys = work_author_keys(data)
+    author = join_author_names(keys, await resolve_authors(db, keys))
+
+    stmt = insert_for(db.get_bind().dialect.name, Book).values(parse_work(olid, data, author))
+    # outra request pode ter gravado o mesmo livro nesse meio tempo
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=[Book.id]))
+    await db.commit()
+    bk = await db.get(Book, olid)
+    if bk is not None:
+        index_books([{"id": bk.id, "title": bk.title, "author": bk.author}])
+    return bk
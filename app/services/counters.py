@@ -0,0 +1,20 @@
+from sqlalchemy import update
+
+# Contadores denormalizados em reviews/users. Sempre atualizados com
+# UPDATE col = col + n na mesma transação da escrita que os altera;
+# app/db/reconcile.py reconstrói tudo caso derivem.
+
+
+def bump_stmt(model, pk, **deltas: int):
+    values = {name: getattr(model, name) + delta for name, delta in deltas.items()}
+    return (
+        update(model)
+        .where(model.id == pk)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rating_deltas(rating: int, sign: int = 1) -> dict[str, int]:
+    # deltas de Book para entrada (sign=1) ou saída (sign=-1) de uma nota
+    return {"review_count": sign, "rating_sum": sign * rating, f"rating_{rating}": sign}
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.services.openlibrary import openlibrary
+
+# caixa máxima (largura, altura) de cada tamanho; L é a capa original
+THUMB_SIZES = {"S": (96, 144), "M": (240, 360)}
+# cada worker só conta o que ele grava: a cada tanto gravado (fração do
+# limite) o uso real do disco é medido de novo antes de decidir a evicção
+RESCAN_FRACTION = 0.05
+
+
+class InvalidCover(Exception):
+    # a OpenLibrary devolveu algo que não é uma imagem legível (502 na rota)
+    pass
+
+
+def check_image(data: bytes):
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.verify()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise InvalidCover(str(exc)) from exc
+
+
+def make_thumbnail(data: bytes, size: str) -> bytes:
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img = img.convert("RGB")
+            img.thumbnail(THUMB_SIZES[size])
+            buf = io.BytesIO()
+            img.save(buf, "JPEG", quality=85, optimize=True)
+    except (OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        # UnidentifiedImageError (não é imagem) e corpo truncado são OSError
+        raise InvalidCover(str(exc)) from exc
+    return buf.getvalue()
+
+
+class CoverStore:
+    """Cache em disco das capas, endereçado por conteúdo.
+
+    objects/ab/<sha256> guarda os bytes; refs/<cover_id>-<size> aponta para o
+    hash. O mtime dos objetos é atualizado a cada leitura e, quando o total
+    passa de COVER_CACHE_MAX_BYTES, os menos usados são removidos (LRU).
+    Refs para objetos removidos viram miss e a capa é buscada de novo.
+    Thumbnails são gerados com Pillow num pool de threads.
+    """
+
+    def __init__(self):
+        self.root: Path | None = None
+        self.max_bytes = 0
+        self._bytes = 0
+        self._unscanned = 0  # gravado por este worker desde a última medição do disco
+        self._bytes_lock = threading.Lock()  # _write/_evict rodam nas threads do pool
+        self._executor: ThreadPoolExecutor | None = None
+        self._refs: TTLCache | None = None
+        self._evicting = False
+        self.fetches = 0
+        self.thumbnails = 0
+        self.evictions = 0
+
+    def start(self):
+        if self._executor is not None:
+            return
+        settings = get_settings()
+        self.root = Path(settings.COVER_CACHE_DIR)
+        self.max_bytes = settings.COVER_CACHE_MAX_BYTES
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        (self.root / "refs").mkdir(parents=True, exist_ok=True)
+        self._bytes = sum(p.stat().st_size for p in (self.root / "objects").glob("*/*"))
+        self._executor = ThreadPoolExecutor(settings.COVER_THUMB_WORKERS, thread_name_prefix="covers")
+        # ref -> hash em memória; também faz o single-flight de buscas concorrentes
+        self._refs = TTLCache(maxsize=4096, ttl=3600)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def _ref_path(self, cover_id: int, size: str) -> Path:
+        return self.root / "refs" / f"{cover_id}-{size}"
+
+    # --- disco (sempre fora do event loop) ---
+
+    def _read_ref(self, cover_id: int, size: str) -> str | None:
+        try:
+            digest = self._ref_path(cover_id, size).read_text().strip()
+        except FileNotFoundError:
+            return None
+        return digest if self._object_path(digest).exists() else None
+
+    def _read_object(self, digest: str) -> bytes | None:
+        path = self._object_path(digest)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # marca como usado (LRU)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def _atomic_write(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write(self, cover_id: int, size: str, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            self._atomic_write(path, data)
+            with self._bytes_lock:
+                self._bytes += len(data)
+                self._unscanned += len(data)
+        self._atomic_write(self._ref_path(cover_id, size), digest.encode())
+        return digest
+
+    def _needs_scan(self) -> bool:
+        with self._bytes_lock:
+            return self._bytes > self.max_bytes or self._unscanned > self.max_bytes * RESCAN_FRACTION
+
+    def _evict(self, keep: str):
+        # mede o disco (inclui o que os outros workers gravaram) e, acima do
+        # limite, remove os objetos menos usados até ficar em 90% dele,
+        # poupando o que acabou de ser gravado (keep)
+        objects = []
+        for path in (self.root / "objects").glob("*/*"):
+            if path.name == keep:
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            objects.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in objects) + self._object_path(keep).stat().st_size
+        if total > self.max_bytes:
+            target = self.max_bytes * 0.9
+            for _, size, path in sorted(objects):
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.evictions += 1
+        with self._bytes_lock:
+            self._bytes = total
+            self._unscanned = 0
+
+    # --- API ---
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _load(self, cover_id: int, size: str) -> str | None:
+        digest = await self._run(self._read_ref, cover_id, size)
+        if digest is not None:
+            return digest
+
+        if size == "L":
+            self.fetches += 1
+            data = await openlibrary.get_cover(cover_id)
+            if data is None:
+                return None
+            # não grava lixo (HTML de erro, corpo truncado) como capa
+            await self._run(check_image, data)
+        else:
+            original = await self.get(cover_id, "L")
+            if original is None:
+                return None
+            self.thumbnails += 1
+            data = await self._run(make_thumbnail, original[1], size)
+
+        digest = await self._run(self._write, cover_id, size, data)
+        if self._needs_scan() and not self._evicting:
+            self._evicting = True
+            try:
+                await self._run(self._evict, digest)
+            finally:
+                self._evicting = False
+        return digest
+
+    async def get(self, cover_id: int, size: str = "L") -> tuple[str, bytes] | None:
+        # (sha256, bytes) ou None se a capa não existe na OpenLibrary
+        if self._executor is None:
+            self.start()
+        key = (cover_id, size)
+        for _ in range(2):
+            digest, _loaded = await self._refs.get_or_load(key, lambda: self._load(cover_id, size))
+            if digest is None:
+                self._refs.delete(key)  # não guarda o 404
+                return None
+            data = await self._run(self._read_object, digest)
+            if data is not None:
+                return digest, data
+            # objeto removido pela evicção (aqui ou em outro worker): busca de novo
+            self._refs.delete(key)
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "fetches": self.fetches,
+            "thumbnails": self.thumbnails,
+            "evictions": self.evictions,
+            "refs": self._refs.stats() if self._refs else None,
+        }
+
+
+cover_store = CoverStore()
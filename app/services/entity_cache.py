@@ -0,0 +1,77 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import get_cache
+from app.models.book import Book
+from app.models.user import User
+from app.services.books import fetch_book
+
+# Payloads de leitura de livros e perfis no cache compartilhado (get_cache).
+# Quem altera as linhas (reviews, follows, upsert da busca) invalida as chaves
+# com invalidate_books/invalidate_users logo após o commit.
+
+BOOKS = "book"
+USERS = "user"
+
+
+def _iso(dt: datetime | None) -> str | None:
+    return dt.isoformat() if dt is not None else None
+
+
+def book_payload(bk: Book) -> dict:
+    # campos de BookPublic + versão para o ETag; cover_url cru (o schema aplica o proxy)
+    return {
+        "id": bk.id,
+        "title": bk.title,
+        "author": bk.author,
+        "cover_url": bk.cover_url,
+        "review_count": bk.review_count,
+        "rating_avg": bk.rating_avg,
+        "updated_at": _iso(bk.updated_at),
+        "fetched_at": _iso(bk.fetched_at),
+    }
+
+
+def user_payload(user: User) -> dict:
+    return {
+        "id": user.id,
+        "name": user.name,
+        "bio": user.bio,
+        "created_at": _iso(user.created_at),
+        "followers": user.follower_count,
+        "following": user.following_count,
+        "reviews": user.review_count,
+    }
+
+
+async def cached_book(db: AsyncSession, olid: str) -> dict | None:
+    # como fetch_book (inclusive buscando na OpenLibrary), mas servido do cache
+    async def load():
+        bk = await fetch_book(db, olid)
+        return book_payload(bk) if bk is not None else None
+
+    return await get_cache().get_or_load(BOOKS, olid, load)
+
+
+async def cached_user(db: AsyncSession, user_id: int) -> dict | None:
+    async def load():
+        user = await db.get(User, user_id)
+        return user_payload(user) if user is not None else None
+
+    return await get_cache().get_or_load(USERS, user_id, load)
+
+
+async def drop_books(*olids: str):
+    await get_cache().delete(BOOKS, *olids)
+
+
+async def drop_users(*user_ids: int):
+    await get_cache().delete(USERS, *user_ids)
+
+
+def invalidate_books(*olids: str):
+    # versões síncronas para as rotas sync (threadpool)
+    get_cache().invalidate(BOOKS, *olids)
+
+
+def invalidate_users(*user_ids: int):
+    get_cache().invalidate(USERS, *user_ids)
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import threading
+from sqlalchemy import bindparam, delete, literal, select, tuple_, update
+from app.core.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.db.upsert import insert_for
+from app.models.review import Review
+from app.models.review_like import ReviewLike
+
+logger = logging.getLogger(__name__)
+
+# Likes como operações condicionais de um statement só: o banco decide se
+# houve mudança (RETURNING) e o contador só anda quando houve. Sem SELECT
+# prévio, sem IntegrityError em cliques concorrentes.
+
+
+def like_stmt(dialect_name: str, review_id: int, user_id: int):
+    # INSERT ... SELECT ... WHERE o review existe ON CONFLICT DO NOTHING RETURNING:
+    # nenhuma linha de volta = já curtido (ou review inexistente)
+    stmt = insert_for(dialect_name, ReviewLike).from_select(
+        ["review_id", "user_id"],
+        select(Review.id, literal(user_id)).where(Review.id == review_id),
+    )
+    return stmt.on_conflict_do_nothing(index_elements=["review_id", "user_id"]).returning(ReviewLike.id)
+
+
+def unlike_stmt(review_id: int, user_id: int):
+    return (
+        delete(ReviewLike)
+        .where(ReviewLike.review_id == review_id, ReviewLike.user_id == user_id)
+        .returning(ReviewLike.id)
+    )
+
+
+def like_count_deltas_stmt():
+    # executemany: um UPDATE por review afetado, com o delta somado do lote
+    return (
+        update(Review)
+        .where(Review.id == bindparam("r_id"))
+        .values(like_count=Review.like_count + bindparam("delta"))
+    )
+
+
+class LikeBuffer:
+    """Write-behind dos likes (LIKES_WRITE_BEHIND).
+
+    As rotas só registram o estado desejado de cada (review, usuário) em
+    memória; a cada LIKES_FLUSH_INTERVAL (ou ao juntar LIKES_BUFFER_MAX) o
+    lote vira um INSERT ON CONFLICT DO NOTHING, um DELETE e um UPDATE por
+    review com o delta somado, numa transação. Cliques repetidos se anulam
+    no buffer e um review viral recebe um UPDATE por flush, não um por like.
+    Os contadores saem das linhas que o banco de fato inseriu/removeu
+    (RETURNING), então continuam exatos. Até o flush, só este worker vê o
+    like (likes/me); contagens ficam atrasadas em até um intervalo. Um lote
+    que falha volta para o buffer; depois de LIKES_FLUSH_MAX_RETRIES falhas
+    seguidas é descartado (e logado), para o buffer não crescer sem limite.
+    """
+
+    def __init__(self):
+        self._pending: dict[tuple[int, int], bool] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._retries = 0  # flushes seguidos que falharam
+        self.flushes = 0
+        self.flushed_events = 0
+        self.failures = 0
+        self.dropped_events = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is None:
+            return
+        # sem cancel: um flush em andamento termina (cancelado no meio do
+        # _write, o lote já fora do buffer se perderia)
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+        await self.flush()  # o que sobrou no buffer
+
+    def add(self, review_id: int, user_id: int, liked: bool):
+        # chamado das rotas sync (threadpool)
+        with self._lock:
+            self._pending[(review_id, user_id)] = liked
+            full = len(self._pending) >= get_settings().LIKES_BUFFER_MAX
+        if full:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def pending(self, review_id: int, user_id: int) -> bool | None:
+        with self._lock:
+            return self._pending.get((review_id, user_id))
+
+    def pending_for_user(self, user_id: int, review_ids: list[int]) -> dict[int, bool]:
+        with self._lock:
+            return {rid: self._pending[(rid, user_id)] for rid in review_ids if (rid, user_id) in self._pending}
+
+    async def _run(self):
+        interval = get_settings().LIKES_FLUSH_INTERVAL
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        try:
+            await self._write(batch)
+        except asyncio.CancelledError:
+            # cancelado de fora (shutdown forçado): o lote volta para o buffer
+            self._requeue(batch)
+            raise
+        except Exception:
+            self.failures += 1
+            self._retries += 1
+            if self._retries < get_settings().LIKES_FLUSH_MAX_RETRIES:
+                logger.exception("likes: flush de %d eventos falhou; voltam para o buffer", len(batch))
+                self._requeue(batch)
+            else:
+                logger.exception("likes: flush falhou %d vezes seguidas; %d eventos descartados", self._retries, len(batch))
+                self._retries = 0
+                self.dropped_events += len(batch)
+            return
+        self._retries = 0
+        self.flushes += 1
+        self.flushed_events += len(batch)
+
+    def _requeue(self, batch: dict[tuple[int, int], bool]):
+        with self._lock:
+            # eventos mais novos para a mesma chave têm precedência
+            self._pending = {**batch, **self._pending}
+
+    async def _write(self, batch: dict[tuple[int, int], bool]):
+        likes = [key for key, liked in batch.items() if liked]
+        unlikes = [key for key, liked in batch.items() if not liked]
+        deltas: dict[int, int] = {}
+        async with AsyncSessionLocal() as db:
+            if likes:
+                # reviews apagados nesse meio tempo saem do lote (FK)
+                existing = set((await db.execute(
+                    select(Review.id).where(Review.id.in_({rid for rid, _ in likes}))
+                )).scalars())
+                rows = [{"review_id": rid, "user_id": uid} for rid, uid in likes if rid in existing]
+                if rows:
+                    stmt = insert_for(db.get_bind().dialect.name, ReviewLike).values(rows)
+                    stmt = stmt.on_conflict_do_nothing(index_elements=["review_id", "user_id"])
+                    for rid in (await db.execute(stmt.returning(ReviewLike.review_id))).scalars():
+                        deltas[rid] = deltas.get(rid, 0) + 1
+            if unlikes:
+                stmt = (
+                    delete(ReviewLike)
+                    .where(tuple_(ReviewLike.review_id, ReviewLike.user_id).in_(unlikes))
+                    .returning(ReviewLike.review_id)
+                )
+                for rid in (await db.execute(stmt)).scalars():
+                    deltas[rid] = deltas.get(rid, 0) - 1
+            changed = sorted((rid, d) for rid, d in deltas.items() if d)  # ordem fixa: sem deadlock entre workers
+            if changed:
+                conn = await db.connection()
+                await conn.execute(like_count_deltas_stmt(), [{"r_id": rid, "delta": d} for rid, d in changed])
+            await db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "enabled": self.enabled,
+            "pending": pending,
+            "flushes": self.flushes,
+            "flushed_events": self.flushed_events,
+            "failures": self.failures,
+            "dropped_events": self.dropped_events,
+        }
+
+
+like_buffer = LikeBuffer()
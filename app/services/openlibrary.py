@@ -0,0 +1,182 @@
+import asyncio
+import random
+import time
+import httpx
+from app.core.circuit import CircuitBreaker
+from app.core.metrics import openlibrary_duration, openlibrary_errors
+from app.core.config import get_settings
+
+# relativos a OPENLIBRARY_BASE_URL
+OPENLIBRARY_SEARCH = "/search.json"
+OPENLIBRARY_WORK = "/works/{olid}.json"
+OPENLIBRARY_AUTHOR = "/authors/{key}.json"
+OPENLIBRARY_COVER = "https://covers.openlibrary.org/b/id/{cover_id}-L.jpg"
+
+
+class UpstreamUnavailable(httpx.HTTPError):
+    """OpenLibrary fora do ar, lenta demais ou com o circuito aberto.
+
+    Subclasse de httpx.HTTPError para que quem já degrada em erros http
+    (ex: resolução de autores) continue degradando; nas rotas vira 503
+    (handler em app/main.py).
+    """
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class OpenLibraryClient:
+    """Cliente http de longa duração para a OpenLibrary.
+
+    Criado e fechado no lifespan do app (ver app/main.py), de modo que as
+    conexões keep-alive são reaproveitadas entre requests.
+    """
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    async def start(self):
+        if self._client is not None:
+            return
+        settings = get_settings()
+        self._client = httpx.AsyncClient(
+            base_url=settings.OPENLIBRARY_BASE_URL,
+            timeout=httpx.Timeout(
+                settings.OPENLIBRARY_READ_TIMEOUT,
+                connect=settings.OPENLIBRARY_CONNECT_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.OPENLIBRARY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENLIBRARY_MAX_KEEPALIVE,
+                keepalive_expiry=settings.OPENLIBRARY_KEEPALIVE_EXPIRY,
+            ),
+            http2=settings.OPENLIBRARY_HTTP2,
+            follow_redirects=True,
+        )
+        self._semaphore = asyncio.Semaphore(settings.OPENLIBRARY_MAX_CONCURRENCY)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._semaphore = None
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        # um circuito por host: a API e covers.openlibrary.org caem separados
+        host = httpx.URL(url).host or "api"
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            settings = get_settings()
+            breaker = self._breakers[host] = CircuitBreaker(
+                settings.OPENLIBRARY_BREAKER_THRESHOLD, settings.OPENLIBRARY_BREAKER_RESET)
+        return breaker
+
+    async def _send(self, url: str, params: dict | None, endpoint: str) -> httpx.Response:
+        # limite global de chamadas em voo: quem não consegue vaga logo falha
+        # em vez de segurar a request (e o worker) na fila
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), get_settings().OPENLIBRARY_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            openlibrary_errors.inc(endpoint, "busy")
+            raise UpstreamUnavailable("OpenLibrary: limite de chamadas simultâneas atingido")
+        start = time.perf_counter()
+        try:
+            r = await self._client.get(url, params=params)
+        except httpx.TimeoutException:
+            openlibrary_errors.inc(endpoint, "timeout")
+            raise
+        except httpx.TransportError:
+            openlibrary_errors.inc(endpoint, "transport")
+            raise
+        finally:
+            self._semaphore.release()
+            openlibrary_duration.observe(time.perf_counter() - start, endpoint)
+        if r.status_code >= 500:
+            openlibrary_errors.inc(endpoint, "http_5xx")
+        return r
+
+    async def get(self, url: str, params: dict | None = None, endpoint: str = "other") -> httpx.Response:
+        """GET com circuit breaker e retentativas (backoff exponencial com jitter).
+
+        Levanta UpstreamUnavailable com o circuito aberto, sem vaga no limite
+        de concorrência ou quando as tentativas se esgotam (erro de rede, 5xx,
+        429). Read timeouts não são repetidos: upstream lento só ficaria mais
+        lento, e o breaker cuida de parar de chamar.
+        """
+        # endpoint: label das métricas (search, work, ...)
+        if self._client is None:
+            # fora do lifespan (scripts, shell): inicializa sob demanda
+            await self.start()
+        settings = get_settings()
+        breaker = self._breaker(url)
+        if not breaker.allow():
+            openlibrary_errors.inc(endpoint, "circuit_open")
+            raise UpstreamUnavailable("OpenLibrary indisponível (circuito aberto)", breaker.retry_after())
+
+        error: Exception | None = None
+        try:
+            for attempt in range(settings.OPENLIBRARY_RETRIES + 1):
+                if attempt:
+                    cap = min(settings.OPENLIBRARY_RETRY_MAX_BACKOFF, settings.OPENLIBRARY_RETRY_BACKOFF * 2 ** attempt)
+                    await asyncio.sleep(random.uniform(0, cap))  # "full jitter"
+                try:
+                    r = await self._send(url, params, endpoint)
+                except (httpx.ReadTimeout, httpx.WriteTimeout) as exc:
+                    error = exc
+                    break
+                except httpx.TransportError as exc:
+                    error = exc
+                    continue
+                if r.status_code < 500 and r.status_code != 429:
+                    breaker.record_success()
+                    return r
+                error = httpx.HTTPStatusError(f"OpenLibrary respondeu {r.status_code}", request=r.request, response=r)
+        except BaseException:
+            # busy / cancelamento: não diz nada sobre a saúde do upstream
+            breaker.release()
+            raise
+        breaker.record_failure()
+        raise UpstreamUnavailable(f"OpenLibrary indisponível: {error}") from error
+
+    def stats(self) -> dict:
+        max_inflight = get_settings().OPENLIBRARY_MAX_CONCURRENCY
+        return {
+            "inflight": max_inflight - self._semaphore._value if self._semaphore else 0,
+            "max_inflight": max_inflight,
+            "breakers": {host: breaker.stats() for host, breaker in self._breakers.items()},
+        }
+
+    async def search(self, q: str, limit: int = 12) -> dict:
+        r = await self.get(OPENLIBRARY_SEARCH, params={"q": q, "limit": limit}, endpoint="search")
+        r.raise_for_status()
+        return r.json()
+
+    async def get_work(self, olid: str) -> dict | None:
+        # None quando a OpenLibrary responde 404
+        r = await self.get(OPENLIBRARY_WORK.format(olid=olid), endpoint="work")
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        return r.json()
+
+    async def get_cover(self, cover_id: int) -> bytes | None:
+        # capa -L original; default=false faz a OpenLibrary responder 404 em vez de um gif vazio
+        url = f"{get_settings().OPENLIBRARY_COVERS_URL.rstrip('/')}/b/id/{cover_id}-L.jpg"
+        r = await self.get(url, params={"default": "false"}, endpoint="cover")
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        return r.content
+
+    async def get_author(self, key: str) -> dict | None:
+        r = await self.get(OPENLIBRARY_AUTHOR.format(key=key), endpoint="author")
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        return r.json()
+
+
+openlibrary = OpenLibraryClient()
@@ -0,0 +1,128 @@
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from app.core.pagination import apply_page
+from app.models.book import Book
+from app.models.comment import Comment
+from app.models.follow import Follow
+from app.models.review import Review, review_version
+from app.models.review_like import ReviewLike
+from app.models.timeline import TimelineEntry
+from app.models.user import User
+
+# Queries quentes das rotas de leitura, montadas num lugar só: as rotas as
+# executam e app/db/explain_check.py roda EXPLAIN nelas mesmas, então a
+# checagem de planos acompanha qualquer mudança aqui.
+
+# ordem (e colunas do cursor) de cada listagem
+REVIEW_ORDER = (Review.created_at, Review.id)  # feed global e reviews de um usuário
+BOOK_REVIEW_ORDER = (Review.id,)
+TIMELINE_ORDER = (TimelineEntry.created_at, TimelineEntry.review_id)
+COMMENT_ORDER = (Comment.id,)
+
+
+def by_user(user_id: int) -> tuple:
+    return (Review.user_id == user_id,)
+
+
+def by_book(olid: str) -> tuple:
+    return (Review.book_id == olid,)
+
+
+def reviews_page(criteria, order, cursor: str | None, limit: int, offset: int = 0):
+    # reviews com o livro embutido (joinedload), uma query por página
+    stmt = select(Review).options(joinedload(Review.book)).where(*criteria)
+    return apply_page(stmt, order, cursor, limit, offset)
+
+
+# o que versiona um review no ETag (com o livro embutido). Os timestamps têm
+# resolução limitada (segundos em alguns bancos), então entram também os
+# campos que contadores e edições mudam
+REVIEW_VERSION = (
+    Review.id,
+    review_version,
+    Review.rating,
+    Review.like_count,
+    Review.comment_count,
+    Book.updated_at,
+    Book.review_count,
+    Book.rating_sum,
+)
+
+
+def review_version_key(review: Review) -> tuple:
+    # a mesma tupla de REVIEW_VERSION, a partir de um review já carregado (com o livro)
+    book = review.book
+    return (
+        review.id,
+        review.updated_at or review.created_at,
+        review.rating,
+        review.like_count,
+        review.comment_count,
+        book.updated_at,
+        book.review_count,
+        book.rating_sum,
+    )
+
+
+def review_version_stmt(review_id: int):
+    return select(*REVIEW_VERSION).join(Book, Book.id == Review.book_id).where(Review.id == review_id)
+
+
+def review_versions_page(criteria, order, cursor: str | None, limit: int, offset: int = 0):
+    # mesma página de reviews_page, só com o que versiona cada item (ETag)
+    stmt = select(*REVIEW_VERSION).join(Book, Book.id == Review.book_id).where(*criteria)
+    return apply_page(stmt, order, cursor, limit, offset)
+
+
+def timeline_page(user_id: int, exclude_authors, cursor: str | None, limit: int, offset: int = 0):
+    # timeline materializada (range no índice user_id, created_at, review_id)
+    stmt = (
+        select(Review)
+        .options(joinedload(Review.book))
+        .join(TimelineEntry, TimelineEntry.review_id == Review.id)
+        .where(TimelineEntry.user_id == user_id)
+    )
+    if exclude_authors:
+        stmt = stmt.where(TimelineEntry.author_id.not_in(exclude_authors))
+    return apply_page(stmt, TIMELINE_ORDER, cursor, limit, offset)
+
+
+def author_reviews_page(author_ids, cursor: str | None, limit: int):
+    # fan-out-on-read: reviews dos autores que não fazem fan-out na escrita
+    stmt = select(Review).options(joinedload(Review.book)).where(Review.user_id.in_(author_ids))
+    return apply_page(stmt, REVIEW_ORDER, cursor, limit)
+
+
+def comments_page(review_id: int, cursor: str | None, limit: int, offset: int = 0):
+    stmt = (
+        select(
+            Comment.id,
+            Comment.content,
+            Comment.user_id,
+            User.name.label("user_name"),
+            Comment.created_at,
+        )
+        .join(User, User.id == Comment.user_id)
+        .where(Comment.review_id == review_id)
+    )
+    return apply_page(stmt, COMMENT_ORDER, cursor, limit, offset, descending=False)
+
+
+def followers_stmt(user_id: int):
+    return select(User).join(Follow, Follow.follower_id == User.id).where(Follow.following_id == user_id)
+
+
+def following_stmt(user_id: int):
+    return select(User).join(Follow, Follow.following_id == User.id).where(Follow.follower_id == user_id)
+
+
+def like_counts_stmt(review_ids):
+    return select(Review.id, Review.like_count).where(Review.id.in_(review_ids))
+
+
+def liked_review_ids_stmt(user_id: int, review_ids):
+    return select(ReviewLike.review_id).where(ReviewLike.user_id == user_id, ReviewLike.review_id.in_(review_ids))
+
+
+def followed_ids_stmt(user_id: int, user_ids):
+    return select(Follow.following_id).where(Follow.follower_id == user_id, Follow.following_id.in_(user_ids))
@@ -0,0 +1,75 @@
+from fastapi import HTTPException, Query
+from sqlalchemy import select
+from app.core.http_cache import make_etag
+from app.models.user import User
+from app.schemas.review import ReviewAuthor, ReviewPublic, ReviewStats, ReviewViewer
+from app.services.queries import liked_review_ids_stmt, review_version_key, review_versions_page
+
+EXPANSIONS = {"author", "stats", "viewer"}
+
+
+def parse_expand(expand: str | None = Query(None, description="Lista separada por vírgula: author,stats,viewer")) -> set[str]:
+    if not expand:
+        return set()
+    fields = {f.strip() for f in expand.split(",") if f.strip()}
+    unknown = fields - EXPANSIONS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown expand: {', '.join(sorted(unknown))}")
+    return fields
+
+
+def expand_reviews(db, reviews, expand: set[str], viewer_id: int | None = None):
+    """Enriquece uma página de reviews com um número fixo de queries.
+
+    stats vem dos contadores denormalizados (sem query), author é um IN
+    sobre os autores da página e viewer um IN sobre os likes do leitor.
+    """
+    if not expand:
+        return reviews
+
+    authors = {}
+    if "author" in expand:
+        author_ids = {r.user_id for r in reviews}
+        if author_ids:
+            rows = db.execute(select(User.id, User.name).where(User.id.in_(author_ids))).all()
+            authors = {row.id: ReviewAuthor.model_validate(row) for row in rows}
+
+    liked = None
+    if "viewer" in expand and viewer_id is not None:
+        review_ids = [r.id for r in reviews]
+        liked = set()
+        if review_ids:
+            liked = set(db.execute(liked_review_ids_stmt(viewer_id, review_ids)).scalars())
+
+    out = []
+    for r in reviews:
+        item = ReviewPublic.model_validate(r)
+        if "author" in expand:
+            item.author = authors.get(r.user_id)
+        if "stats" in expand:
+            item.stats = ReviewStats(likes=r.like_count, comments=r.comment_count)
+        if liked is not None:
+            item.viewer = ReviewViewer(liked=r.id in liked)
+        out.append(item)
+    return out
+
+
+def _reviews_etag(versions, expand: set[str], viewer_id: int | None) -> str:
+    return make_etag("reviews", sorted(expand), viewer_id if "viewer" in expand else None, *versions)
+
+
+def page_etag(db, criteria, order, cursor, limit, offset, expand: set[str], viewer_id: int | None = None) -> str:
+    """ETag de uma página de reviews a partir de uma query estreita.
+
+    Mesma paginação da rota, mas só a versão de cada item (REVIEW_VERSION).
+    Só vale a pena com um If-None-Match para comparar: sem ele a rota usa
+    loaded_page_etag nas linhas que já carregou. Sem Last-Modified: um
+    review apagado não avança nenhum timestamp.
+    """
+    rows = db.execute(review_versions_page(criteria, order, cursor, limit, offset)).all()
+    return _reviews_etag([tuple(row) for row in rows], expand, viewer_id)
+
+
+def loaded_page_etag(reviews, expand: set[str], viewer_id: int | None = None) -> str:
+    # o mesmo ETag de page_etag, das linhas da página (antes do finish_page)
+    return _reviews_etag([review_version_key(r) for r in reviews], expand, viewer_id)
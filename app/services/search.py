@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings
+from app.models.book import Book, book_search_text
+
+# mesmo default de pg_trgm.word_similarity_threshold
+WORD_SIMILARITY_THRESHOLD = 0.6
+# candidatos do índice em memória que vão para o ranking por review_count
+MAX_CANDIDATES = 200
+
+
+def trigrams(text: str) -> set[str]:
+    # como o pg_trgm: cada palavra com dois espaços antes e um depois
+    grams = set()
+    for word in "".join(ch if ch.isalnum() else " " for ch in text.lower()).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Índice invertido trigrama -> ids de livros, em memória (por worker).
+
+    Usado quando o banco não é Postgres. Sincroniza com a tabela books de
+    tempos em tempos (por updated_at), e os livros gravados por este worker
+    entram na hora via `add`.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, set[str]] = defaultdict(set)
+        self._docs: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = asyncio.Lock()
+        self._watermark = None
+        self._next_sync = 0.0
+        self.active = False  # ligado no primeiro sync (nunca no Postgres)
+
+    def add(self, book_id: str, title: str, author: str | None):
+        grams = trigrams(f"{title} {author or ''}")
+        with self._lock:
+            old = self._docs.get(book_id)
+            if old == grams:
+                return
+            for gram in old or ():
+                self._postings[gram].discard(book_id)
+            for gram in grams:
+                self._postings[gram].add(book_id)
+            self._docs[book_id] = grams
+
+    def search(self, q: str, limit: int = MAX_CANDIDATES) -> list[tuple[str, float]]:
+        # score ~ word_similarity: fração dos trigramas da query presentes no livro
+        grams = trigrams(q)
+        if not grams:
+            return []
+        hits: Counter[str] = Counter()
+        with self._lock:
+            for gram in grams:
+                hits.update(self._postings.get(gram, ()))
+        scored = [(book_id, n / len(grams)) for book_id, n in hits.items() if n / len(grams) >= WORD_SIMILARITY_THRESHOLD]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    async def sync(self, db: AsyncSession):
+        if time.monotonic() < self._next_sync:
+            return
+        async with self._sync_lock:
+            if time.monotonic() < self._next_sync:
+                return
+            stmt = select(Book.id, Book.title, Book.author, Book.updated_at)
+            if self._watermark is not None:
+                # folga de 1s: o SQLite grava updated_at sem frações de segundo
+                stmt = stmt.where(Book.updated_at >= self._watermark - timedelta(seconds=1))
+            for book_id, title, author, updated_at in (await db.execute(stmt)).all():
+                self.add(book_id, title, author)
+                if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+                    self._watermark = updated_at
+            self._next_sync = time.monotonic() + get_settings().LOCAL_SEARCH_SYNC_INTERVAL
+            self.active = True
+
+    def stats(self) -> dict:
+        return {"active": self.active, "books": len(self._docs), "trigrams": len(self._postings)}
+
+
+book_index = TrigramIndex()
+
+
+def index_books(docs: list[dict]):
+    # livros recém-gravados por este worker; só interessa se o índice está em uso
+    if book_index.active:
+        for doc in docs:
+            book_index.add(doc["id"], doc["title"], doc.get("author"))
+
+
+async def search_local(db: AsyncSession, q: str, limit: int) -> list[Book]:
+    # prefixo / substring / fuzzy sobre o cache de livros, ranqueado pelos nossos reviews
+    if db.get_bind().dialect.name == "postgresql":
+        # %> (word similarity) e LIKE usam o índice GIN ix_books_search_trgm
+        stmt = (
+            select(Book)
+            .where(book_search_text.op("%>")(q) | book_search_text.contains(q, autoescape=True))
+            .order_by(Book.review_count.desc(), book_search_text.op("<->>")(q), Book.id)
+            .limit(limit)
+        )
+        return list((await db.scalars(stmt)).all())
+
+    await book_index.sync(db)
+    scored = dict(book_index.search(q))
+    if not scored:
+        return []
+    books = (await db.scalars(select(Book).where(Book.id.in_(scored)))).all()
+    ranked = sorted(books, key=lambda bk: (-bk.review_count, -scored[bk.id], bk.id))
+    return ranked[:limit]
@@ -0,0 +1,115 @@
+from sqlalchemy import select, delete, literal
+from app.core.config import get_settings
+from app.db.upsert import insert_for
+from app.models.follow import Follow
+from app.models.review import Review
+from app.models.user import User
+from app.models.timeline import TimelineEntry
+from app.services.queries import followed_ids_stmt
+
+# Home timeline (fan-out-on-write). Cada review novo é copiado para a timeline
+# dos seguidores do autor; autores com muitos seguidores ficam de fora e
+# entram no feed na leitura (fan-out-on-read). As funções abaixo devolvem
+# statements, para servirem tanto à Session quanto à AsyncSession.
+
+TIMELINE_COLUMNS = ["user_id", "review_id", "author_id", "created_at"]
+
+
+def follower_count_stmt(author_id: int):
+    return select(User.follower_count).where(User.id == author_id)
+
+
+def is_high_fanout(follower_count: int) -> bool:
+    return follower_count > get_settings().TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+def high_fanout_ids_stmt():
+    # autores acima do limite (poucos): range em ix_users_follower_count
+    return select(User.id).where(User.follower_count > get_settings().TIMELINE_FANOUT_MAX_FOLLOWERS)
+
+
+def fanout_review_stmt(review_id: int):
+    # INSERT ... SELECT: um statement para todos os seguidores
+    src = (
+        select(Follow.follower_id, Review.id, Review.user_id, Review.created_at)
+        .join(Review, Review.user_id == Follow.following_id)
+        .where(Review.id == review_id)
+    )
+    return TimelineEntry.__table__.insert().from_select(TIMELINE_COLUMNS, src)
+
+
+def remove_review_stmt(review_id: int):
+    return delete(TimelineEntry).where(TimelineEntry.review_id == review_id)
+
+
+def remove_author_stmt(user_id: int, author_id: int):
+    return delete(TimelineEntry).where(TimelineEntry.user_id == user_id, TimelineEntry.author_id == author_id)
+
+
+def purge_author_stmt(author_id: int):
+    # autor passou a fazer fan-out-on-read: tira os reviews dele de todas as timelines
+    return delete(TimelineEntry).where(TimelineEntry.author_id == author_id)
+
+
+def backfill_followers_stmt(dialect_name: str, author_id: int):
+    # autor voltou a fazer fan-out na escrita: os reviews recentes (inclusive os
+    # escritos enquanto ele estava acima do limite) voltam para as timelines
+    # de todos os seguidores; os que já estão lá são ignorados
+    recent = (
+        select(Review.id, Review.user_id, Review.created_at)
+        .where(Review.user_id == author_id)
+        .order_by(Review.created_at.desc(), Review.id.desc())
+        .limit(get_settings().TIMELINE_BACKFILL)
+        .subquery()
+    )
+    src = (
+        select(Follow.follower_id, recent.c.id, recent.c.user_id, recent.c.created_at)
+        .join(recent, recent.c.user_id == Follow.following_id)
+    )
+    stmt = insert_for(dialect_name, TimelineEntry).from_select(TIMELINE_COLUMNS, src)
+    return stmt.on_conflict_do_nothing(index_elements=["user_id", "review_id"])
+
+
+def backfill_author_stmt(dialect_name: str, user_id: int, author_id: int):
+    # ao seguir alguém, copia os reviews mais recentes dele para a timeline;
+    # os que já estão lá (fan-out concorrente de um review novo) são ignorados
+    recent = (
+        select(literal(user_id), Review.id, Review.user_id, Review.created_at)
+        .where(Review.user_id == author_id)
+        .order_by(Review.created_at.desc(), Review.id.desc())
+        .limit(get_settings().TIMELINE_BACKFILL)
+    )
+    stmt = insert_for(dialect_name, TimelineEntry).from_select(TIMELINE_COLUMNS, recent)
+    return stmt.on_conflict_do_nothing(index_elements=["user_id", "review_id"])
+
+
+def high_fanout_followees(db, user_id: int) -> list[int]:
+    # autores seguidos por user_id que não fazem fan-out na escrita. Parte do
+    # conjunto (pequeno) de autores grandes e testa quais user_id segue, em vez
+    # de varrer todos os follows do leitor
+    big = list(db.execute(high_fanout_ids_stmt()).scalars())
+    if not big:
+        return []
+    return list(db.execute(followed_ids_stmt(user_id, big)).scalars())
+
+
+def rebuild_timelines(db):
+    # reconstrói todas as timelines a partir de follows + reviews
+    big = high_fanout_ids_stmt()
+    src = (
+        select(Follow.follower_id, Review.id, Review.user_id, Review.created_at)
+        .join(Review, Review.user_id == Follow.following_id)
+        .where(Follow.following_id.not_in(big))
+    )
+    db.execute(delete(TimelineEntry))
+    db.execute(TimelineEntry.__table__.insert().from_select(TIMELINE_COLUMNS, src))
+    db.commit()
+
+
+if __name__ == "__main__":
+    from app.db.database import SessionLocal
+    import app.db.init_db  # noqa: F401  registra todos os models
+
+    with SessionLocal() as session:
+        rebuild_timelines(session)
+    print("Timelines reconstruídas")
@@ -0,0 +1,62 @@
+"""OpenLibrary falsa para benchmarks: respostas determinísticas com latência configurável.
+
+    uvicorn bench.fake_openlibrary:app --port 9000
+    OPENLIBRARY_BASE_URL=http://127.0.0.1:9000 OPENLIBRARY_COVERS_URL=http://127.0.0.1:9000 uvicorn app.main:app
+
+FAKE_OL_LATENCY_MS controla o atraso de cada resposta (padrão 80ms).
+"""
+import asyncio
+import hashlib
+import io
+import os
+from functools import lru_cache
+from fastapi import FastAPI, Query, Response
+
+LATENCY = float(os.getenv("FAKE_OL_LATENCY_MS", "80")) / 1000
+
+app = FastAPI()
+
+
+def _n(value: str, mod: int) -> int:
+    return int(hashlib.sha1(value.encode()).hexdigest(), 16) % mod
+
+
+@app.get("/search.json")
+async def search(q: str, limit: int = Query(12)):
+    await asyncio.sleep(LATENCY)
+    base = _n(q, 100_000)
+    return {"docs": [
+        {"key": f"/works/OL{base + i}W", "title": f"{q.title()} {i}", "author_name": [f"Author {(base + i) % 5000}"],
+         "cover_i": base + i}
+        for i in range(limit)
+    ]}
+
+
+@app.get("/works/{olid}.json")
+async def work(olid: str):
+    await asyncio.sleep(LATENCY)
+    n = _n(olid, 5000)
+    return {"title": f"Work {olid}", "covers": [_n(olid, 1_000_000)], "authors": [{"author": {"key": f"/authors/OL{n}A"}}]}
+
+
+@app.get("/authors/{key}.json")
+async def author(key: str):
+    await asyncio.sleep(LATENCY)
+    return {"name": f"Author {key}"}
+
+
+@lru_cache(maxsize=64)
+def _cover_jpeg(cover_id: int) -> bytes:
+    # capa sintética do tamanho de uma capa -L real (precisa de Pillow)
+    from PIL import Image
+
+    buf = io.BytesIO()
+    color = (cover_id * 37 % 256, cover_id * 91 % 256, cover_id * 53 % 256)
+    Image.new("RGB", (400, 600), color).save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+@app.get("/b/id/{name}")
+async def cover(name: str):
+    await asyncio.sleep(LATENCY)
+    return Response(_cover_jpeg(_n(name, 64)), media_type="image/jpeg")
@@ -0,0 +1,135 @@
+"""Servidor mínimo do protocolo Redis (RESP2) para testar o cache compartilhado
+sem um redis-server de verdade.
+
+    python -m bench.fake_redis --port 6390
+    CACHE_BACKEND=tiered CACHE_REDIS_URL=redis://127.0.0.1:6390/0 uvicorn app.main:app --workers 4
+
+Suporta só o que app/core/cache.py usa: GET, MGET, SET (EX/PX), DEL, PUBLISH,
+SUBSCRIBE/UNSUBSCRIBE, PING, além de SELECT/CLIENT para o handshake.
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        self.channels: dict[bytes, set[asyncio.StreamWriter]] = defaultdict(set)
+
+    def _get(self, key: bytes) -> bytes | None:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    # --- RESP ---
+
+    @staticmethod
+    def encode(value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, str):
+            return b"+" + value.encode() + b"\r\n"
+        if isinstance(value, bytes):
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if isinstance(value, Exception):
+            return b"-ERR " + str(value).encode() + b"\r\n"
+        return b"*%d\r\n" % len(value) + b"".join(FakeRedis.encode(v) for v in value)
+
+    @staticmethod
+    async def read_command(reader: asyncio.StreamReader) -> list[bytes] | None:
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # comando inline (ex: via telnet)
+        args = []
+        for _ in range(int(line[1:])):
+            size = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    # --- comandos ---
+
+    def execute(self, args: list[bytes], writer: asyncio.StreamWriter):
+        cmd, rest = args[0].upper(), args[1:]
+        if cmd == b"PING":
+            return "PONG"
+        if cmd in (b"SELECT", b"CLIENT"):
+            return "OK"
+        if cmd == b"GET":
+            return self._get(rest[0])
+        if cmd == b"MGET":
+            return [self._get(key) for key in rest]
+        if cmd == b"SET":
+            key, value, opts = rest[0], rest[1], [o.upper() for o in rest[2:]]
+            expires_at = None
+            if b"EX" in opts:
+                expires_at = time.monotonic() + float(rest[2 + opts.index(b"EX") + 1])
+            if b"PX" in opts:
+                expires_at = time.monotonic() + float(rest[2 + opts.index(b"PX") + 1]) / 1000
+            self.data[key] = (value, expires_at)
+            return "OK"
+        if cmd == b"DEL":
+            return sum(self.data.pop(key, None) is not None for key in rest)
+        if cmd == b"PUBLISH":
+            channel, message = rest
+            subscribers = list(self.channels.get(channel, ()))
+            for sub in subscribers:
+                sub.write(self.encode([b"message", channel, message]))
+            return len(subscribers)
+        if cmd == b"SUBSCRIBE":
+            replies = []
+            for channel in rest:
+                self.channels[channel].add(writer)
+                replies.append([b"subscribe", channel, sum(writer in subs for subs in self.channels.values())])
+            return replies
+        if cmd == b"UNSUBSCRIBE":
+            replies = []
+            for channel in rest or [c for c, subs in self.channels.items() if writer in subs]:
+                self.channels[channel].discard(writer)
+                replies.append([b"unsubscribe", channel, sum(writer in subs for subs in self.channels.values())])
+            return replies
+        return ValueError(f"unknown command '{cmd.decode()}'")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while (args := await self.read_command(reader)) is not None:
+                if not args:
+                    continue
+                reply = self.execute(args, writer)
+                if args[0].upper() in (b"SUBSCRIBE", b"UNSUBSCRIBE"):
+                    # uma resposta por canal, não um array de respostas
+                    writer.write(b"".join(self.encode(r) for r in reply))
+                else:
+                    writer.write(self.encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for subs in self.channels.values():
+                subs.discard(writer)
+            writer.close()
+
+
+async def main(host: str, port: int):
+    server = await asyncio.start_server(FakeRedis().handle, host, port)
+    print(f"fake redis em {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    asyncio.run(main(args.host, args.port))
@@ -0,0 +1,203 @@
+"""Driver de carga contra a API real.
+
+    # 1. banco sintético e OpenLibrary falsa
+    python -m bench.seed --scale small
+    uvicorn bench.fake_openlibrary:app --port 9000 &
+    # 2. API apontando para o fake
+    OPENLIBRARY_BASE_URL=http://127.0.0.1:9000 OPENLIBRARY_COVERS_URL=http://127.0.0.1:9000 \
+        uvicorn app.main:app --workers 4 &
+    # 3. carga
+    python -m bench.run --duration 30 --concurrency 64
+    python -m bench.run --compare bench/results/<sha-anterior>.json
+
+Reporta throughput e p50/p95/p99 por rota e grava o resultado em
+bench/results/<git-sha>.json, para comparar entre commits.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+from bench.seed import BENCH_PASSWORD
+
+RESULTS_DIR = Path(__file__).parent / "results"
+SEARCH_TERMS = [f"title {i}" for i in range(500)]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, route: str, **kwargs) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            r = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            return None
+        self.latencies[route].append((time.perf_counter() - start) * 1000)
+        if r.status_code >= 400:
+            self.errors[route] += 1
+        return r
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+class Context:
+    def __init__(self, tokens: list[str], hot_reviews: list[int]):
+        self.tokens = tokens
+        self.hot_reviews = hot_reviews
+        self.signups = 0
+
+    def auth(self) -> dict:
+        return {"Authorization": f"Bearer {random.choice(self.tokens)}"}
+
+
+async def feed_scroll(client, ctx: Context, rec: Recorder):
+    headers = ctx.auth()
+    cursor = None
+    for _ in range(5):
+        params = {"limit": 20, "expand": "author,stats,viewer"}
+        if cursor:
+            params["cursor"] = cursor
+        r = await rec.request(client, "GET", "/follows/me/feed", "GET /follows/me/feed", params=params, headers=headers)
+        cursor = r.headers.get("x-next-cursor") if r is not None else None
+        if not cursor:
+            break
+
+
+async def recent_reviews(client, ctx: Context, rec: Recorder):
+    await rec.request(client, "GET", "/reviews/feed", "GET /reviews/feed", params={"limit": 50, "expand": "author,stats"})
+
+
+async def book_search(client, ctx: Context, rec: Recorder):
+    # termos populares repetem bastante (zipf), como na vida real
+    term = SEARCH_TERMS[min(int(random.paretovariate(1.2)) - 1, len(SEARCH_TERMS) - 1)]
+    await rec.request(client, "GET", "/books/search", "GET /books/search", params={"q": term})
+
+
+async def like_storm(client, ctx: Context, rec: Recorder):
+    review_id = random.choice(ctx.hot_reviews)
+    await rec.request(client, "POST", f"/reviews/{review_id}/like", "POST /reviews/{id}/like", headers=ctx.auth())
+
+
+async def auth_burst(client, ctx: Context, rec: Recorder):
+    ctx.signups += 1
+    email = f"burst{time.time_ns()}_{ctx.signups}@bench.example.com"
+    await rec.request(client, "POST", "/signup", "POST /signup", json={"name": "burst", "email": email, "password": BENCH_PASSWORD})
+    await rec.request(client, "POST", "/login", "POST /login", data={"username": email, "password": BENCH_PASSWORD})
+
+
+SCENARIOS = {
+    "feed": (feed_scroll, 5),
+    "recent": (recent_reviews, 3),
+    "search": (book_search, 3),
+    "likes": (like_storm, 2),
+    "auth": (auth_burst, 1),
+}
+
+
+async def setup(client: httpx.AsyncClient, users: int) -> Context:
+    tokens = []
+    for i in range(1, users + 1):
+        r = await client.post("/login", data={"username": f"user{i}@bench.example.com", "password": BENCH_PASSWORD})
+        r.raise_for_status()
+        tokens.append(r.json()["access_token"])
+    r = await client.get("/reviews/feed", params={"limit": 20})
+    r.raise_for_status()
+    hot = [review["id"] for review in r.json()] or [1]
+    return Context(tokens, hot)
+
+
+async def run(base_url: str, duration: float, concurrency: int, scenarios: list[str], users: int) -> dict:
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        ctx = await setup(client, users)
+        funcs = [SCENARIOS[name][0] for name in scenarios]
+        weights = [SCENARIOS[name][1] for name in scenarios]
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                await random.choices(funcs, weights=weights)[0](client, ctx, rec)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    routes = {}
+    for route, values in sorted(rec.latencies.items()):
+        routes[route] = {
+            "requests": len(values),
+            "errors": rec.errors.get(route, 0),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+        }
+    return {
+        "commit": _git_sha(),
+        "timestamp": int(time.time()),
+        "config": {"base_url": base_url, "duration": duration, "concurrency": concurrency, "scenarios": scenarios},
+        "total_rps": round(sum(len(v) for v in rec.latencies.values()) / elapsed, 2),
+        "routes": routes,
+    }
+
+
+def _git_sha() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def report(result: dict, baseline: dict | None = None):
+    print(f"commit {result['commit']}  total {result['total_rps']} req/s")
+    header = f"{'route':32} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    print(header)
+    print("-" * len(header))
+    for route, r in result["routes"].items():
+        print(f"{route:32} {r['requests']:>7} {r['errors']:>5} {r['rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}")
+        base = (baseline or {}).get("routes", {}).get(route)
+        if base:
+            deltas = []
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+                if base[key]:
+                    deltas.append(f"{key} {(r[key] - base[key]) / base[key] * 100:+.1f}%")
+            print(f"{'  vs ' + baseline['commit']:32} " + "  ".join(deltas))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--users", type=int, default=50, help="usuários do seed logados no setup")
+    parser.add_argument("--compare", type=Path, help="resultado anterior (JSON) para comparar")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    result = asyncio.run(run(args.base_url, args.duration, args.concurrency, args.scenarios.split(","), args.users))
+    # lido antes de gravar: o baseline pode ser o arquivo do mesmo commit
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    RESULTS_DIR.mkdir(exist_ok=True)
+    out = RESULTS_DIR / f"{result['commit']}.json"
+    out.write_text(json.dumps(result, indent=2))
+    report(result, baseline)
+    print(f"resultado salvo em {out}")
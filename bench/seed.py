@@ -0,0 +1,148 @@
+"""Popula um banco local com um grafo social sintético para benchmarks.
+
+    python -m bench.seed --scale small     # ~5k usuários
+    python -m bench.seed --scale large     # ~300k usuários, milhões de reviews
+
+Usa DATABASE_URL (o banco é apagado e recriado: nunca aponte para produção).
+Seguidores seguem uma lei de potência (poucos autores com muitos
+seguidores), como numa rede real. Todos os usuários têm a senha BENCH_PASSWORD.
+"""
+import argparse
+import itertools
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, text
+
+from app.core.security import hash_password
+from app.db.database import Base, SessionLocal, engine
+from app.db.init_db import init_db
+from app.db.reconcile import reconcile_book_stats, reconcile_counters
+from app.models.book import Book
+from app.models.comment import Comment
+from app.models.follow import Follow
+from app.models.review import Review
+from app.models.review_like import ReviewLike
+from app.models.user import User
+from app.services.timeline import rebuild_timelines
+
+BENCH_PASSWORD = "benchpass"
+CHUNK = 10_000
+
+SCALES = {
+    #         users,   books, follows/user, reviews/user, likes/review, comments/review
+    "small": (5_000, 2_000, 20, 4, 3, 1),
+    "medium": (50_000, 20_000, 40, 6, 4, 1),
+    "large": (300_000, 100_000, 50, 8, 5, 2),
+}
+
+
+def _insert(conn, model, rows):
+    # insert em lotes (executemany / insertmanyvalues)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK:
+            conn.execute(insert(model), batch)
+            batch = []
+    if batch:
+        conn.execute(insert(model), batch)
+
+
+def _power_law(n: int, alpha: float = 1.1) -> list[float]:
+    # pesos cumulativos (cum_weights) para random.choices, calculados uma vez
+    return list(itertools.accumulate(1.0 / (rank ** alpha) for rank in range(1, n + 1)))
+
+
+def seed(scale: str, seed_value: int = 1):
+    n_users, n_books, follows_per_user, reviews_per_user, likes_per_review, comments_per_review = SCALES[scale]
+    rnd = random.Random(seed_value)
+    now = datetime.now(tz=timezone.utc)
+    password_hash = hash_password(BENCH_PASSWORD)
+
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        _insert(conn, User, (
+            {"id": i, "name": f"user{i}", "email": f"user{i}@bench.example.com", "password_hash": password_hash,
+             "created_at": now - timedelta(days=365)}
+            for i in range(1, n_users + 1)
+        ))
+        _insert(conn, Book, (
+            {"id": f"OL{i}W", "title": f"Bench Book {i}", "author": f"Author {i % 5000}",
+             "cover_url": f"https://covers.openlibrary.org/b/id/{i}-L.jpg"}
+            for i in range(1, n_books + 1)
+        ))
+
+        # lei de potência: o usuário de rank k recebe seguidores com peso 1/k^alpha
+        user_ids = list(range(1, n_users + 1))
+        weights = _power_law(n_users)
+
+        def follows():
+            for follower in user_ids:
+                targets = set(rnd.choices(user_ids, cum_weights=weights, k=follows_per_user))
+                targets.discard(follower)
+                for target in targets:
+                    yield {"follower_id": follower, "following_id": target}
+
+        _insert(conn, Follow, follows())
+
+        book_weights = _power_law(n_books, alpha=0.9)
+        review_ids = []
+
+        def reviews():
+            review_id = 0
+            for user_id in user_ids:
+                count = rnd.randint(0, reviews_per_user * 2)
+                for book_n in set(rnd.choices(range(1, n_books + 1), cum_weights=book_weights, k=count)):
+                    review_id += 1
+                    review_ids.append(review_id)
+                    yield {
+                        "id": review_id, "user_id": user_id, "book_id": f"OL{book_n}W",
+                        "rating": rnd.randint(1, 5), "content": "bench review " * rnd.randint(1, 20),
+                        "created_at": now - timedelta(seconds=rnd.randint(0, 365 * 86400)),
+                    }
+
+        _insert(conn, Review, reviews())
+
+        review_weights = _power_law(len(review_ids))
+
+        def likes():
+            n = len(review_ids) * likes_per_review
+            seen = set()
+            for review_id, user_id in zip(
+                rnd.choices(review_ids, cum_weights=review_weights, k=n),
+                rnd.choices(user_ids, k=n),
+            ):
+                if (review_id, user_id) not in seen:
+                    seen.add((review_id, user_id))
+                    yield {"review_id": review_id, "user_id": user_id}
+
+        _insert(conn, ReviewLike, likes())
+        _insert(conn, Comment, (
+            {"review_id": review_id, "user_id": rnd.choice(user_ids), "content": "bench comment"}
+            for review_id in rnd.choices(review_ids, cum_weights=review_weights, k=len(review_ids) * comments_per_review)
+        ))
+
+    with SessionLocal() as db:
+        reconcile_counters(db)
+        reconcile_book_stats(db)
+        rebuild_timelines(db)
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            # ids explícitos não avançam as sequences
+            for table in ("users", "reviews"):
+                conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"))
+        conn.execute(text("ANALYZE"))
+    print(f"seed {scale}: {n_users} usuários, {len(review_ids)} reviews em {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    seed(args.scale, args.seed)
@@ -0,0 +1,119 @@
+"""Micro-benchmark da serialização das páginas (sem banco, sem http).
+
+    python -m bench.serialization
+    python -m bench.serialization --sizes 20,100 --repeat 200
+
+Compara, por rota e tamanho de página, o caminho padrão do FastAPI
+(response_model validando o retorno da rota e gerando o JSON no
+pydantic-core) com as alternativas, e o custo/ganho da compressão
+gzip/brotli sobre o JSON resultante.
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import app.db.init_db  # noqa: F401  registra todos os models
+from app.core.responses import ORJSONResponse
+from app.models.book import Book
+from app.models.review import Review
+from app.schemas.comment import CommentUser
+from app.schemas.review import ReviewAuthor, ReviewPublic, ReviewStats
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REVIEWS = TypeAdapter(list[ReviewPublic])
+COMMENTS = TypeAdapter(list[CommentUser])
+
+
+def make_reviews(n: int) -> list[Review]:
+    # objetos ORM transientes, como os que as rotas recebem do joinedload
+    now = datetime.now(tz=timezone.utc)
+    out = []
+    for i in range(n):
+        book = Book(id=f"OL{i}W", title=f"Bench Book {i}", author=f"Author {i % 50}",
+                    cover_url=f"https://covers.openlibrary.org/b/id/{i}-L.jpg", review_count=i, rating_sum=i * 4)
+        review = Review(id=i, user_id=i % 97, book_id=book.id, rating=1 + i % 5,
+                        content="bench review " * 12, like_count=i * 3, comment_count=i % 7, created_at=now - timedelta(minutes=i))
+        review.book = book
+        out.append(review)
+    return out
+
+
+def make_comments(n: int) -> list[dict]:
+    now = datetime.now(tz=timezone.utc)
+    return [{"id": i, "content": "bench comment", "user_id": i, "user_name": f"user{i}", "created_at": now} for i in range(n)]
+
+
+def fastapi_default(adapter: TypeAdapter, content) -> bytes:
+    # o que o FastAPI faz com response_model: valida o retorno e gera JSON
+    return adapter.dump_json(adapter.validate_python(content))
+
+
+def expanded(reviews: list[Review]) -> list[ReviewPublic]:
+    # como expand_reviews: um model por item, enriquecido depois
+    out = []
+    for r in reviews:
+        item = ReviewPublic.model_validate(r)
+        item.author = ReviewAuthor(id=r.user_id, name=f"user{r.user_id}")
+        item.stats = ReviewStats(likes=r.like_count, comments=r.comment_count)
+        out.append(item)
+    return out
+
+
+def timed(fn, repeat: int) -> tuple[float, bytes]:
+    body = fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6, body
+
+
+def run(sizes: list[int], repeat: int):
+    print(f"{'rota / caminho':52} {'tamanho':>8} {'µs':>9} {'bytes':>8}")
+    for n in sizes:
+        reviews = make_reviews(n)
+        comments = make_comments(n)
+        cases = {
+            "reviews: FastAPI response_model": lambda: fastapi_default(REVIEWS, reviews),
+            "reviews: models + orjson": lambda: ORJSONResponse([m.model_dump() for m in REVIEWS.validate_python(reviews)]).body,
+            "reviews?expand: expand + response_model": lambda: fastapi_default(REVIEWS, expanded(reviews)),
+            "reviews?expand: expand + dump_json (sem revalidar)": lambda: REVIEWS.dump_json(expanded(reviews)),
+            "comments: dicts + response_model": lambda: fastapi_default(COMMENTS, comments),
+            "comments: dicts + jsonable_encoder/json": lambda: json.dumps(jsonable_encoder(comments)).encode(),
+            "comments: dicts + ORJSONResponse": lambda: ORJSONResponse(comments).body,
+        }
+        body = b""
+        for name, fn in cases.items():
+            micros, out = timed(fn, repeat)
+            body = out if name == "reviews: FastAPI response_model" else body
+            print(f"{name:52} {n:>8} {micros:>9.1f} {len(out):>8}")
+
+        for name, fn in (
+            ("gzip nível 6", lambda: gzip.compress(body, 6)),
+            ("brotli q4", (lambda: brotli.compress(body, quality=4)) if brotli else None),
+        ):
+            if fn is None:
+                continue
+            micros, out = timed(fn, repeat)
+            print(f"{'reviews: + ' + name:52} {n:>8} {micros:>9.1f} {len(out):>8}")
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="20,100")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run([int(s) for s in args.sizes.split(",")], args.repeat)
@@ -0,0 +1,130 @@
+import io
+import os
+import tempfile
+
+# o app lê DATABASE_URL/Settings no import: configura antes de importar app.*
+_tmp = tempfile.mkdtemp(prefix="bookreviews-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["SECRET_KEY"] = "test-secret"
+os.environ["INTERNAL_TOKEN"] = "test-token"
+os.environ["COVER_CACHE_DIR"] = f"{_tmp}/covers"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.cache import get_cache
+from app.core.principal import get_principal_cache
+from app.db.database import Base, engine
+from app.db.init_db import init_db
+from app.main import app
+from app.services.books import get_search_cache
+from app.services.openlibrary import openlibrary
+
+
+def jpeg(seed: int, size=(300, 450)) -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", size, (seed % 256, 80, 160)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+class FakeOpenLibrary:
+    # works OL<n>W existem (exceto os de `missing`); capas são JPEGs gerados
+    def __init__(self):
+        self.calls = 0
+        self.missing: set[str] = set()
+        self.covers: dict[int, bytes] = {}  # corpo fixo de uma capa (lixo, truncado...)
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        path = request.url.path
+        if path == "/search.json":
+            return httpx.Response(200, json={"docs": [
+                {"key": "/works/OL1W", "title": "Dune", "author_name": ["Frank Herbert"], "cover_i": 11},
+                {"key": "/works/OL2W", "title": "Emma", "author_name": ["Jane Austen"]},
+            ]})
+        if path.startswith("/authors/"):
+            return httpx.Response(200, json={"name": "Author " + path.split("/")[-1].removesuffix(".json")})
+        if path.startswith("/works/"):
+            olid = path.split("/")[-1].removesuffix(".json")
+            if olid in self.missing:
+                return httpx.Response(404)
+            return httpx.Response(200, json={
+                "title": f"Work {olid}",
+                "covers": [5],
+                "authors": [{"author": {"key": "/authors/OL9A"}}],
+            })
+        if path.startswith("/b/id/"):
+            cover_id = int(path.split("/")[-1].removesuffix("-L.jpg"))
+            return httpx.Response(200, content=self.covers.get(cover_id) or jpeg(cover_id))
+        return httpx.Response(404)
+
+
+@pytest.fixture(scope="session")
+def fake_openlibrary():
+    return FakeOpenLibrary()
+
+
+@pytest.fixture(scope="session")
+def client(fake_openlibrary):
+    init_db()
+    with TestClient(app) as c:
+        c.headers["X-Internal-Token"] = "test-token"
+        openlibrary._client = httpx.AsyncClient(
+            base_url="https://openlibrary.org", transport=httpx.MockTransport(fake_openlibrary)
+        )
+        yield c
+
+
+@pytest.fixture(autouse=True)
+def clean_state(client, fake_openlibrary):
+    # cada teste começa com o banco e os caches vazios
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(text(f"DELETE FROM {table.name}"))
+    get_cache().backend.lru.clear()
+    get_principal_cache().clear()
+    get_search_cache().clear()
+    openlibrary._breakers.clear()
+    fake_openlibrary.missing.clear()
+    fake_openlibrary.covers.clear()
+    yield
+
+
+@pytest.fixture
+def signup(client):
+    # cria e loga um usuário: (headers de auth, id)
+    def make(name: str) -> tuple[dict, int]:
+        r = client.post("/signup", json={"name": name, "email": f"{name}@example.com", "password": "pw"})
+        assert r.status_code == 201, r.text
+        r = client.post("/login", data={"username": f"{name}@example.com", "password": "pw"})
+        assert r.status_code == 200, r.text
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        return headers, client.get("/me", headers=headers).json()["id"]
+
+    return make
+
+
+def post_review(client, headers, olid: str, rating: int = 4, content: str = "x") -> dict:
+    r = client.post("/reviews", json={"book_id": olid, "content": content, "rating": rating}, headers=headers)
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+def all_pages(client, path: str, limit: int, **kwargs) -> list[list[int]]:
+    # segue X-Next-Cursor até o fim; falha se uma página se repetir
+    pages, params = [], {"limit": limit}
+    while True:
+        r = client.get(path, params=params, **kwargs)
+        assert r.status_code == 200, r.text
+        ids = [item["id"] for item in r.json()]
+        assert ids not in pages, f"página repetida: {ids}"
+        pages.append(ids)
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+        params = {"limit": limit, "cursor": cursor}
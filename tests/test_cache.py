@@ -0,0 +1,80 @@
+import asyncio
+
+from app.core.cache import Cache, MemoryBackend, TTLCache
+
+
+def _cache() -> Cache:
+    return Cache(MemoryBackend(maxsize=100, ttl=60), prefix="test", default_ttl=60)
+
+
+def test_invalidation_during_load_is_not_overwritten():
+    async def scenario():
+        cache = _cache()
+        await cache.start()
+        loading, release = asyncio.Event(), asyncio.Event()
+
+        async def loader():
+            loading.set()
+            await release.wait()
+            return {"count": 1}  # lido antes da mudança
+
+        leader = asyncio.create_task(cache.get_or_load("users", 1, loader))
+        await loading.wait()
+        await cache.delete("users", 1)  # a mudança commitou durante o carregamento
+        release.set()
+        assert await leader == {"count": 1}
+        return await cache.get("users", 1)
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_sync_invalidate_during_load():
+    async def scenario():
+        cache = _cache()
+        await cache.start()
+        loading, release = asyncio.Event(), asyncio.Event()
+
+        async def loader():
+            loading.set()
+            await release.wait()
+            return {"count": 1}
+
+        leader = asyncio.create_task(cache.get_or_load("users", 1, loader))
+        await loading.wait()
+        # rota sync no threadpool
+        await asyncio.to_thread(cache.invalidate, "users", 1)
+        release.set()
+        await leader
+        stale = await cache.get("users", 1)
+        # sem invalidação no meio, o próximo carregamento é gravado
+        await cache.get_or_load("users", 1, loader)
+        return stale, await cache.get("users", 1)
+
+    assert asyncio.run(scenario()) == (None, {"count": 1})
+
+
+def test_coalesced_loads_share_one_call():
+    async def scenario():
+        cache = TTLCache(maxsize=10, ttl=60)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "v"
+
+        results = await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(5)))
+        return calls, [value for value, _ in results]
+
+    assert asyncio.run(scenario()) == (1, ["v"] * 5)
+
+
+def test_counters_not_stale_after_follow(client, signup):
+    alice, alice_id = signup("alice")
+    bob, _ = signup("bob")
+    assert client.get(f"/users/{alice_id}/counters").json()["followers"] == 0
+    client.post(f"/follows/{alice_id}", headers=bob)
+    assert client.get(f"/users/{alice_id}/counters").json()["followers"] == 1
+    client.delete(f"/follows/{alice_id}", headers=bob)
+    assert client.get(f"/users/{alice_id}/counters").json()["followers"] == 0
@@ -0,0 +1,89 @@
+from tests.conftest import post_review
+
+
+def likes(client, review_id: int) -> int:
+    return client.get(f"/reviews/{review_id}/likes/count").json()["likes"]
+
+
+def stats(client, review_id: int) -> dict:
+    # contadores denormalizados, como a listagem os expõe
+    page = client.get("/reviews/feed", params={"expand": "stats"}).json()
+    return next(item["stats"] for item in page if item["id"] == review_id)
+
+
+def test_review_counters_and_book_payload(client, signup):
+    alice, alice_id = signup("alice")
+    bob, bob_id = signup("bob")
+    # payloads em cache antes das escritas: cada escrita tem de invalidá-los
+    assert client.get("/books/OL1W").json()["review_count"] == 0
+    assert client.get(f"/users/{alice_id}/counters").json()["reviews"] == 0
+
+    mine = post_review(client, alice, "OL1W", rating=4)
+    theirs = post_review(client, bob, "OL1W", rating=2)
+    book = client.get("/books/OL1W").json()
+    assert (book["review_count"], book["rating_avg"]) == (2, 3.0)
+    assert client.get(f"/users/{alice_id}/counters").json()["reviews"] == 1
+
+    r = client.put(f"/reviews/{theirs['id']}", json={"content": "y", "rating": 5}, headers=bob)
+    assert r.status_code == 200, r.text
+    assert client.get("/books/OL1W").json()["rating_avg"] == 4.5
+    assert client.get("/books/OL1W/stats").json()["histogram"]["5"] == 1
+
+    assert client.delete(f"/reviews/{mine['id']}", headers=alice).status_code == 204
+    book = client.get("/books/OL1W").json()
+    assert (book["review_count"], book["rating_avg"]) == (1, 5.0)
+    assert client.get(f"/users/{alice_id}/counters").json()["reviews"] == 0
+    assert client.get(f"/users/{bob_id}/counters").json()["reviews"] == 1
+
+
+def test_like_is_idempotent(client, signup):
+    alice, _ = signup("alice")
+    bob, _ = signup("bob")
+    review_id = post_review(client, alice, "OL1W")["id"]
+
+    for _ in range(2):  # retry / clique duplo
+        assert client.put(f"/reviews/{review_id}/like", headers=bob).json() == {"liked": True}
+    assert likes(client, review_id) == 1
+    assert client.get(f"/reviews/{review_id}/likes/me", headers=bob).json()["liked"] is True
+    assert stats(client, review_id)["likes"] == 1
+
+    for _ in range(2):
+        assert client.delete(f"/reviews/{review_id}/like", headers=bob).status_code == 204
+    assert likes(client, review_id) == 0
+
+    # toggle
+    assert client.post(f"/reviews/{review_id}/like", headers=bob).json() == {"liked": True}
+    assert client.post(f"/reviews/{review_id}/like", headers=alice).json() == {"liked": True}
+    assert client.post(f"/reviews/{review_id}/like", headers=bob).json() == {"liked": False}
+    r = client.get("/reviews/likes/count", params={"ids": [review_id, 999]})
+    assert r.json() == [{"review_id": review_id, "likes": 1}, {"review_id": 999, "likes": 0}]
+
+    assert client.put("/reviews/999/like", headers=bob).status_code == 404
+
+
+def test_comment_counter(client, signup):
+    alice, _ = signup("alice")
+    bob, _ = signup("bob")
+    review_id = post_review(client, alice, "OL1W")["id"]
+    comment_ids = [
+        client.post(f"/comments/review/{review_id}", json={"content": "c"}, headers=bob).json()["id"]
+        for _ in range(2)
+    ]
+    assert stats(client, review_id)["comments"] == 2
+    assert client.delete(f"/comments/{comment_ids[0]}", headers=alice).status_code == 403
+    assert client.delete(f"/comments/{comment_ids[0]}", headers=bob).status_code == 204
+    assert stats(client, review_id)["comments"] == 1
+
+
+def test_follow_counters(client, signup):
+    alice, alice_id = signup("alice")
+    bob, bob_id = signup("bob")
+    for _ in range(2):  # o segundo follow não conta de novo
+        assert client.post(f"/follows/{alice_id}", headers=bob).status_code == 201
+    assert client.get(f"/users/{alice_id}/counters").json()["followers"] == 1
+    assert client.get(f"/users/{bob_id}/counters").json()["following"] == 1
+
+    for _ in range(2):
+        assert client.delete(f"/follows/{alice_id}", headers=bob).status_code == 204
+    assert client.get(f"/users/{alice_id}/counters").json()["followers"] == 0
+    assert client.get(f"/users/{bob_id}/counters").json()["following"] == 0
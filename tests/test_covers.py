@@ -0,0 +1,50 @@
+import asyncio
+from pathlib import Path
+
+from app.services.covers import RESCAN_FRACTION, CoverStore
+
+from tests.conftest import jpeg
+
+
+def test_thumbnail_of_cover(client):
+    r = client.get("/covers/31?size=S")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/jpeg"
+
+
+def test_non_image_cover_is_bad_gateway(client, fake_openlibrary):
+    fake_openlibrary.covers[32] = b"<html>Service Unavailable</html>"
+    for size in ("S", "M", "L"):
+        r = client.get(f"/covers/32?size={size}")
+        assert r.status_code == 502, (size, r.text)
+
+
+def test_truncated_cover_is_bad_gateway(client, fake_openlibrary):
+    data = jpeg(33)
+    fake_openlibrary.covers[33] = data[: len(data) // 2]
+    assert client.get("/covers/33?size=M").status_code == 502
+
+
+def test_eviction_counts_other_workers(client, tmp_path):
+    # vários workers gravando no mesmo diretório: cada um só vê as próprias
+    # gravações, mas a decisão de evicção tem que olhar o disco inteiro
+    size = len(jpeg(0))
+    stores = [CoverStore() for _ in range(4)]
+
+    async def fill():
+        for store in stores:
+            store.start()
+            store.root = tmp_path
+            (tmp_path / "objects").mkdir(exist_ok=True)
+            (tmp_path / "refs").mkdir(exist_ok=True)
+            store.max_bytes = 40 * size
+        peak = 0
+        for cover_id in range(100, 300):
+            await stores[cover_id % len(stores)].get(cover_id, "L")
+            peak = max(peak, sum(p.stat().st_size for p in Path(tmp_path, "objects").glob("*/*")))
+        for store in stores:
+            store.close()
+        return peak
+
+    peak = asyncio.run(fill())
+    assert peak <= 40 * size * (1 + len(stores) * RESCAN_FRACTION) + size
@@ -0,0 +1,89 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event, text
+
+from app.db.database import engine
+from tests.conftest import post_review
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _freeze_book_timestamp(olid: str, updated_at):
+    # simula duas mudanças dentro da resolução do timestamp
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE books SET updated_at = :t WHERE id = :id"), {"t": updated_at, "id": olid})
+
+
+def _book_updated_at(olid: str):
+    with engine.begin() as conn:
+        return conn.execute(text("SELECT updated_at FROM books WHERE id = :id"), {"id": olid}).scalar()
+
+
+def test_book_etag_changes_with_rating_in_same_instant(client, signup):
+    alice, _ = signup("alice")
+    review = post_review(client, alice, "OL1W", rating=4)
+    stats = client.get("/books/OL1W/stats")
+    book = client.get("/books/OL1W")
+    assert stats.json()["rating_avg"] == 4.0
+    assert client.get("/books/OL1W/stats", headers={"If-None-Match": stats.headers["etag"]}).status_code == 304
+
+    before = _book_updated_at("OL1W")
+    r = client.put(f"/reviews/{review['id']}", json={"rating": 2}, headers=alice)
+    assert r.status_code == 200, r.text
+    _freeze_book_timestamp("OL1W", before)
+
+    r = client.get("/books/OL1W/stats", headers={"If-None-Match": stats.headers["etag"]})
+    assert r.status_code == 200
+    assert r.json()["rating_avg"] == 2.0
+    r = client.get("/books/OL1W", headers={"If-None-Match": book.headers["etag"]})
+    assert r.status_code == 200
+    assert r.json()["rating_avg"] == 2.0
+
+
+def test_review_list_etag_roundtrip(client, signup):
+    alice, _ = signup("alice")
+    bob, _ = signup("bob")
+    review = post_review(client, alice, "OL1W")
+
+    first = client.get("/reviews/feed")
+    etag = first.headers["etag"]
+    # o ETag tirado das linhas carregadas bate com o da query de versões
+    assert client.get("/reviews/feed", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/reviews/{review['id']}/like", headers=bob)
+    r = client.get("/reviews/feed", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+
+def test_review_detail_etag_roundtrip(client, signup):
+    alice, _ = signup("alice")
+    bob, _ = signup("bob")
+    review = post_review(client, alice, "OL1W")
+
+    first = client.get(f"/reviews/{review['id']}")
+    assert client.get(f"/reviews/{review['id']}", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    client.post(f"/comments/review/{review['id']}", json={"content": "hi"}, headers=bob)
+    assert client.get(f"/reviews/{review['id']}", headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+
+
+def test_no_version_query_without_validator(client, signup):
+    alice, _ = signup("alice")
+    review = post_review(client, alice, "OL1W")
+
+    with count_queries() as statements:
+        assert client.get("/reviews/feed").status_code == 200
+        assert client.get(f"/reviews/{review['id']}").status_code == 200
+    assert len(statements) == 2, statements
@@ -0,0 +1,56 @@
+import base64
+import json
+
+from sqlalchemy import text
+
+from app.db.database import engine
+from tests.conftest import all_pages, post_review
+
+
+def _cursor(*values) -> str:
+    raw = json.dumps(list(values)).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def test_feed_pages_with_tied_timestamps(client, signup):
+    # reviews criados no mesmo segundo: o cursor tem de andar mesmo assim
+    alice, alice_id = signup("alice")
+    ids = [post_review(client, alice, f"OL{i}W")["id"] for i in range(1, 6)]
+    expected = sorted(ids, reverse=True)
+    with engine.begin() as conn:
+        # empate total em created_at: a ordem sai do id
+        conn.execute(text("UPDATE reviews SET created_at = (SELECT MIN(created_at) FROM reviews)"))
+
+    for path in ("/reviews/feed", f"/users/{alice_id}/reviews"):
+        pages = all_pages(client, path, limit=2)
+        assert [i for page in pages for i in page] == expected
+        assert len(pages) == 3
+
+
+def test_home_feed_second_page(client, signup):
+    alice, alice_id = signup("alice")
+    bob, _ = signup("bob")
+    client.post(f"/follows/{alice_id}", headers=bob)
+    ids = [post_review(client, alice, f"OL{i}W")["id"] for i in range(1, 4)]
+
+    pages = all_pages(client, "/follows/me/feed", limit=2, headers=bob)
+    assert pages == [sorted(ids, reverse=True)[:2], sorted(ids, reverse=True)[2:]]
+
+
+def test_comments_pages(client, signup):
+    alice, _ = signup("alice")
+    review = post_review(client, alice, "OL1W")
+    for i in range(5):
+        client.post(f"/comments/review/{review['id']}", json={"content": f"c{i}"}, headers=alice)
+
+    pages = all_pages(client, f"/comments/review/{review['id']}", limit=2)
+    assert [len(p) for p in pages] == [2, 2, 1]
+
+
+def test_malformed_cursor_is_400(client, signup):
+    alice, _ = signup("alice")
+    post_review(client, alice, "OL1W")
+    for cursor in ("not-a-cursor", _cursor("2026-01-01T00:00:00", "1"), _cursor(1, 1), _cursor("2026-01-01T00:00:00")):
+        r = client.get("/reviews/feed", params={"cursor": cursor})
+        assert r.status_code == 400, (cursor, r.text)
+    assert client.get("/reviews/book/OL1W", params={"cursor": _cursor("1")}).status_code == 400
@@ -0,0 +1,15 @@
+from app.core import responses
+from tests.conftest import post_review
+
+
+def test_json_rows_without_orjson(client, signup, monkeypatch):
+    alice, _ = signup("alice")
+    review = post_review(client, alice, "OL1W")
+    client.post(f"/comments/review/{review['id']}", json={"content": "hi"}, headers=alice)
+    with_orjson = client.get(f"/comments/review/{review['id']}").json()
+
+    monkeypatch.setattr(responses, "orjson", None)
+    r = client.get(f"/comments/review/{review['id']}")
+    assert r.status_code == 200, r.text
+    assert [c["content"] for c in r.json()] == ["hi"]
+    assert r.json()[0]["created_at"][:19] == with_orjson[0]["created_at"][:19]
@@ -0,0 +1,59 @@
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.db.database import SessionLocal, engine
+from app.models.timeline import TimelineEntry
+from app.services.timeline import backfill_author_stmt, high_fanout_followees
+from tests.conftest import post_review
+
+
+def feed_ids(client, headers) -> list[int]:
+    r = client.get("/follows/me/feed", headers=headers)
+    assert r.status_code == 200, r.text
+    return [item["id"] for item in r.json()]
+
+
+def test_backfill_skips_entries_already_there(client, signup):
+    # fan-out concorrente já copiou um review: o backfill do follow não pode falhar
+    alice, alice_id = signup("alice")
+    bob, bob_id = signup("bob")
+    review_ids = {post_review(client, alice, f"OL{i}W")["id"] for i in (1, 2)}
+    assert client.post(f"/follows/{alice_id}", headers=bob).status_code == 201
+
+    with engine.begin() as conn:
+        conn.execute(backfill_author_stmt(conn.dialect.name, bob_id, alice_id))
+        rows = conn.execute(select(TimelineEntry.review_id).where(TimelineEntry.user_id == bob_id)).scalars().all()
+    assert sorted(rows) == sorted(review_ids)
+    assert set(feed_ids(client, bob)) == review_ids
+
+
+def test_feed_mixes_high_fanout_authors(client, signup, monkeypatch):
+    monkeypatch.setattr(get_settings(), "TIMELINE_FANOUT_MAX_FOLLOWERS", 1)
+    celeb, celeb_id = signup("celeb")
+    small, small_id = signup("small")
+    bob, bob_id = signup("bob")
+    carol, carol_id = signup("carol")
+
+    for who in (bob, carol):
+        assert client.post(f"/follows/{celeb_id}", headers=who).status_code == 201
+    assert client.post(f"/follows/{small_id}", headers=bob).status_code == 201
+
+    with SessionLocal() as db:
+        assert high_fanout_followees(db, bob_id) == [celeb_id]
+        assert high_fanout_followees(db, small_id) == []
+
+    ids = [
+        post_review(client, celeb, "OL1W")["id"],
+        post_review(client, small, "OL2W")["id"],
+        post_review(client, celeb, "OL3W")["id"],
+    ]
+    # o celeb não faz fan-out na escrita, mas aparece no feed (na leitura)
+    assert feed_ids(client, bob) == ids[::-1]
+    assert feed_ids(client, carol) == [ids[2], ids[0]]
+
+    # carol sai: o celeb volta a fazer fan-out e os reviews voltam às timelines
+    assert client.delete(f"/follows/{celeb_id}", headers=carol).status_code == 204
+    with engine.connect() as conn:
+        copied = conn.execute(select(TimelineEntry.review_id).where(TimelineEntry.user_id == bob_id)).scalars().all()
+    assert sorted(copied) == sorted(ids)
+    assert feed_ids(client, bob) == ids[::-1]